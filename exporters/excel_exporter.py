@@ -1,6 +1,5 @@
 """Exportador a formato Excel"""
 
-import pandas as pd
 from pathlib import Path
 from typing import List, Dict
 
@@ -25,6 +24,11 @@ class ExcelExporter:
             return False
 
         try:
+            # pandas y openpyxl se importan aquí: tardan medio segundo en
+            # cargar y solo hacen falta al exportar a Excel
+            import pandas as pd
+            from openpyxl.utils import get_column_letter
+
             Path(archivo_salida).parent.mkdir(parents=True, exist_ok=True)
 
             # Convertir a DataFrame
@@ -39,19 +43,13 @@ class ExcelExporter:
             with pd.ExcelWriter(archivo_salida, engine='openpyxl') as writer:
                 df.to_excel(writer, sheet_name='Leyes', index=False)
 
-                # Ajustar ancho de columnas
+                # Ajustar ancho de columnas: las longitudes se calculan sobre
+                # el DataFrame en lugar de recorrer las celdas de openpyxl
                 worksheet = writer.sheets['Leyes']
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(cell.value)
-                        except:
-                            pass
+                for indice, col in enumerate(df.columns, start=1):
+                    max_length = max(len(str(col)), int(df[col].astype(str).str.len().max()))
                     adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
+                    worksheet.column_dimensions[get_column_letter(indice)].width = adjusted_width
 
             print(f"✅ Exportado a Excel: {archivo_salida} ({len(datos)} registros)")
             return True
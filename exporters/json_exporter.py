@@ -4,6 +4,13 @@ import json
 from pathlib import Path
 from typing import List, Dict
 
+# orjson (opcional) serializa en C directamente a UTF-8, pero solo admite
+# indentación de 2 espacios
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class JSONExporter:
     """Exporta datos de leyes a formato JSON"""
@@ -28,8 +35,15 @@ class JSONExporter:
         try:
             Path(archivo_salida).parent.mkdir(parents=True, exist_ok=True)
 
-            with open(archivo_salida, 'w', encoding='utf-8') as f:
-                json.dump(datos, f, ensure_ascii=False, indent=indent)
+            if orjson is not None and indent in (None, 2):
+                opciones = orjson.OPT_INDENT_2 if indent else 0
+                with open(archivo_salida, 'wb') as f:
+                    f.write(orjson.dumps(datos, option=opciones))
+            else:
+                with open(archivo_salida, 'w', encoding='utf-8') as f:
+                    # Con indent, json.dump escribe fragmento a fragmento;
+                    # serializar en memoria y escribir una sola vez es más rápido
+                    f.write(json.dumps(datos, ensure_ascii=False, indent=indent))
 
             print(f"✅ Exportado a JSON: {archivo_salida} ({len(datos)} registros)")
             return True
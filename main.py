@@ -11,24 +11,84 @@ Uso:
 """
 
 import argparse
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Dict, Optional, Tuple
 
 # Agregar el directorio actual al path
 sys.path.insert(0, str(Path(__file__).parent))
 
 # Importar módulos del scraper
 from scraper.multi_site_scraper import MultiSiteScraper
-from scraper.sites.tcp_jurisprudencia_scraper import TCPJurisprudenciaScraper
 from scraper.document_processor import DocumentProcessor
-from scraper.metadata import MetadataExtractor
+from scraper.metadata import MetadataExtractor, calcular_hashes_archivo
 from scraper.pdf_splitter import PDFSplitter
 from scraper.database import LawDatabase
 from exporters import CSVExporter, JSONExporter, ExcelExporter
 
 
+# Extensiones de los documentos descargados que se procesan
+EXTENSIONES_A_PROCESAR = frozenset({'.pdf', '.doc', '.docx'})
+
+# Leyes que se acumulan antes de guardarlas en la BD en una transacción
+TAMANIO_LOTE_BD = 100
+
+# Procesador y extractor propios de cada proceso del pool de documentos
+_processor_worker = None
+_extractor_worker = None
+
+
+def _extraer_documento(archivo: Path, fecha_scraping: str,
+                       processor: DocumentProcessor,
+                       metadata_extractor: MetadataExtractor) -> Tuple[Dict, Optional[Dict]]:
+    """
+    Extrae el texto y los metadatos de un documento
+
+    Args:
+        archivo: Ruta al documento
+        fecha_scraping: Marca de tiempo del lote
+        processor: Procesador de documentos
+        metadata_extractor: Extractor de metadatos
+
+    Returns:
+        Tupla (resultado del procesamiento, metadatos o None si falló)
+    """
+    try:
+        resultado_procesamiento = processor.procesar_documento(str(archivo))
+        if not resultado_procesamiento['exito']:
+            return resultado_procesamiento, None
+
+        metadatos = metadata_extractor.extraer_metadatos(
+            resultado_procesamiento['texto'],
+            archivo_path=str(archivo),
+            sitio_web=archivo.parent.name,
+            url_origen="",
+            fecha_scraping=fecha_scraping
+        )
+        return resultado_procesamiento, metadatos
+
+    except Exception as e:
+        return {'exito': False, 'error': str(e)}, None
+
+
+def _inicializar_worker_documentos(output_dir: str):
+    """Crea el procesador y el extractor de un proceso del pool"""
+    global _processor_worker, _extractor_worker
+    # Ya hay un documento por proceso: el OCR de cada uno va en serie para
+    # no lanzar procesos por página dentro de cada worker
+    _processor_worker = DocumentProcessor(output_dir, ocr_workers=1)
+    _extractor_worker = MetadataExtractor()
+
+
+def _extraer_documento_en_worker(archivo: Path, fecha_scraping: str) -> Tuple[Dict, Optional[Dict]]:
+    """Extrae un documento con el procesador del proceso actual"""
+    return _extraer_documento(archivo, fecha_scraping, _processor_worker, _extractor_worker)
+
+
 class BuhoScraper:
     """Clase principal que orquesta todo el sistema de scraping"""
 
@@ -38,7 +98,7 @@ class BuhoScraper:
         print("=" * 60)
 
         self.scraper = MultiSiteScraper()
-        self.tcp_scraper = TCPJurisprudenciaScraper()
+        self._tcp_scraper = None  # Se crea al usarlo (carga Selenium)
         self.processor = DocumentProcessor()
         self.metadata_extractor = MetadataExtractor()
         self.pdf_splitter = PDFSplitter()
@@ -46,12 +106,21 @@ class BuhoScraper:
 
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    def ejecutar_scraping_completo(self, max_workers: int = 5):
+    @property
+    def tcp_scraper(self):
+        """Scraper del TCP; Selenium solo se importa si se usa"""
+        if self._tcp_scraper is None:
+            from scraper.sites.tcp_jurisprudencia_scraper import TCPJurisprudenciaScraper
+            self._tcp_scraper = TCPJurisprudenciaScraper()
+        return self._tcp_scraper
+
+    def ejecutar_scraping_completo(self, max_workers: int = 5, solo_cambios: bool = False):
         """
         Ejecuta el proceso completo de scraping
 
         Args:
             max_workers: Número de hilos concurrentes
+            solo_cambios: Si True, omite los sitios cuyo listado no cambió
         """
         print("\n🚀 FASE 1: SCRAPING DE SITIOS WEB")
         print("-" * 60)
@@ -63,7 +132,10 @@ class BuhoScraper:
         )
 
         # Scrapear todos los sitios
-        resultados = self.scraper.scrapear_todos_los_sitios(max_workers=max_workers)
+        resultados = self.scraper.scrapear_todos_los_sitios(
+            max_workers=max_workers,
+            solo_cambios=solo_cambios
+        )
 
         print(f"\n✅ Scraping completado:")
         print(f"   - Sitios exitosos: {len(resultados['exitosos'])}")
@@ -117,7 +189,9 @@ class BuhoScraper:
 
     def procesar_documentos(self, directorio: str = "data/raw",
                           aplicar_ocr: bool = True,
-                          dividir_pdfs: bool = True):
+                          dividir_pdfs: bool = True,
+                          procesos: Optional[int] = None,
+                          reprocesar: bool = False):
         """
         Procesa todos los documentos descargados
 
@@ -125,93 +199,143 @@ class BuhoScraper:
             directorio: Directorio con documentos crudos
             aplicar_ocr: Si se debe aplicar OCR
             dividir_pdfs: Si se deben dividir los PDFs grandes
+            procesos: Documentos que se extraen en paralelo (por defecto,
+                uno por CPU hasta 8; 1 los procesa en serie)
+            reprocesar: Si True, procesa también los archivos cuyo contenido
+                ya está registrado en la base de datos
         """
         print("\n📄 FASE 2: PROCESAMIENTO DE DOCUMENTOS")
         print("-" * 60)
 
+        # Un solo recorrido del árbol en lugar de un rglob por extensión
         directorio_path = Path(directorio)
-        archivos = list(directorio_path.rglob("*.pdf"))
-        archivos.extend(list(directorio_path.rglob("*.doc*")))
+        archivos = [archivo for archivo in directorio_path.rglob("*")
+                    if archivo.suffix in EXTENSIONES_A_PROCESAR]
 
         print(f"📁 {len(archivos)} archivos encontrados para procesar")
 
+        # Omitir los archivos cuyo contenido (hash MD5) ya está en la BD: se
+        # consulta por lotes en lugar de extraer el texto de cada uno
+        if archivos and not reprocesar:
+            hashes = {archivo: calcular_hashes_archivo(archivo, ('md5',))['md5']
+                      for archivo in archivos}
+            registrados = self.db.hashes_registrados(hashes.values())
+            if registrados:
+                archivos = [archivo for archivo in archivos
+                            if hashes[archivo] not in registrados]
+                print(f"⏭️  {len(hashes) - len(archivos)} archivos ya registrados sin cambios, "
+                      f"se omiten (usar --reprocesar para forzarlos)")
+
         documentos_procesados = 0
         documentos_con_error = 0
+        pendientes = []  # Metadatos a la espera de guardarse en la BD
+
+        # Una sola marca de tiempo para todo el lote
+        fecha_scraping = datetime.now().isoformat()
+
+        # 1-2. Extraer texto y metadatos: es la parte CPU-bound, así que se
+        # reparte por documento entre procesos. La BD y la división de PDFs
+        # se quedan en este proceso; los resultados llegan en orden
+        procesos = min(procesos or min(os.cpu_count() or 1, 8), len(archivos) or 1)
+        pool = None
+        if procesos > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=procesos,
+                initializer=_inicializar_worker_documentos,
+                initargs=(str(self.processor.output_dir),)
+            )
+            extracciones = pool.map(_extraer_documento_en_worker, archivos, repeat(fecha_scraping))
+        else:
+            extracciones = (
+                _extraer_documento(archivo, fecha_scraping, self.processor, self.metadata_extractor)
+                for archivo in archivos
+            )
 
-        for archivo in archivos:
-            print(f"\n   Procesando: {archivo.name}")
+        try:
+            for archivo, (resultado_procesamiento, metadatos) in zip(archivos, extracciones):
+                print(f"\n   Procesando: {archivo.name}")
+
+                try:
+                    if metadatos is None:
+                        print(f"   ❌ Error procesando: {resultado_procesamiento.get('error')}")
+                        documentos_con_error += 1
+                        continue
+
+                    texto = resultado_procesamiento['texto']
+                    print(f"   ✅ Texto extraído: {len(texto)} caracteres")
+
+                    # Agregar información de procesamiento
+                    metadatos.update({
+                        'numero_paginas': resultado_procesamiento.get('numero_paginas', 0),
+                        'ocr_aplicado': resultado_procesamiento.get('ocr_aplicado', False),
+                        'confianza_ocr': resultado_procesamiento.get('confianza_ocr', 0.0),
+                        'texto_extraido': texto,
+                        'estado_procesamiento': 'completado'
+                    })
+
+                    print(f"   📋 Metadatos extraídos:")
+                    print(f"      - Ley: {metadatos.get('numero_ley')}")
+                    print(f"      - Área: {metadatos.get('area_derecho')}")
+                    print(f"      - Tipo: {metadatos.get('tipo_norma')}")
+
+                    # 3. Dividir PDFs grandes si es necesario (antes de guardar,
+                    # para registrar las secciones en la misma inserción)
+                    if dividir_pdfs and resultado_procesamiento.get('numero_paginas', 0) > 50:
+                        print(f"   ✂️  Dividiendo PDF ({resultado_procesamiento['numero_paginas']} páginas)...")
+                        archivos_divididos = self.pdf_splitter.dividir_pdf(
+                            str(archivo),
+                            max_paginas_por_seccion=30
+                        )
 
-            try:
-                # 1. Extraer texto del documento
-                resultado_procesamiento = self.processor.procesar_documento(str(archivo))
+                        # Agregar metadatos a cada sección
+                        for archivo_dividido in archivos_divididos:
+                            self.metadata_extractor.agregar_metadatos_a_pdf(
+                                archivo_dividido,
+                                metadatos
+                            )
 
-                if not resultado_procesamiento['exito']:
-                    print(f"   ❌ Error procesando: {resultado_procesamiento.get('error')}")
-                    documentos_con_error += 1
-                    continue
-
-                texto = resultado_procesamiento['texto']
-                print(f"   ✅ Texto extraído: {len(texto)} caracteres")
-
-                # 2. Extraer metadatos
-                sitio_web = archivo.parent.name
-                metadatos = self.metadata_extractor.extraer_metadatos(
-                    texto,
-                    archivo_path=str(archivo),
-                    sitio_web=sitio_web,
-                    url_origen=""
-                )
-
-                # Agregar información de procesamiento
-                metadatos.update({
-                    'numero_paginas': resultado_procesamiento.get('numero_paginas', 0),
-                    'ocr_aplicado': resultado_procesamiento.get('ocr_aplicado', False),
-                    'confianza_ocr': resultado_procesamiento.get('confianza_ocr', 0.0),
-                    'texto_extraido': texto,
-                    'estado_procesamiento': 'completado'
-                })
-
-                print(f"   📋 Metadatos extraídos:")
-                print(f"      - Ley: {metadatos.get('numero_ley')}")
-                print(f"      - Área: {metadatos.get('area_derecho')}")
-                print(f"      - Tipo: {metadatos.get('tipo_norma')}")
-
-                # 3. Guardar en base de datos
-                ley_id = self.db.insertar_ley(metadatos)
-
-                if ley_id:
-                    print(f"   💾 Guardado en BD con ID: {ley_id}")
-                    documentos_procesados += 1
-
-                # 4. Dividir PDFs grandes si es necesario
-                if dividir_pdfs and resultado_procesamiento.get('numero_paginas', 0) > 50:
-                    print(f"   ✂️  Dividiendo PDF ({resultado_procesamiento['numero_paginas']} páginas)...")
-                    archivos_divididos = self.pdf_splitter.dividir_pdf(
-                        str(archivo),
-                        max_paginas_por_seccion=30
-                    )
-
-                    # Agregar metadatos a cada sección
-                    for archivo_dividido in archivos_divididos:
-                        self.metadata_extractor.agregar_metadatos_a_pdf(
-                            archivo_dividido,
-                            metadatos
-                        )
+                        metadatos['archivos_divididos'] = archivos_divididos
+
+                    # 4. Guardar en base de datos por lotes
+                    pendientes.append(metadatos)
+                    if len(pendientes) >= TAMANIO_LOTE_BD:
+                        guardadas, fallidas = self._guardar_lote(pendientes)
+                        documentos_procesados += guardadas
+                        documentos_con_error += fallidas
 
-                    # Actualizar en BD con archivos divididos
-                    self.db.actualizar_ley(
-                        metadatos['codigo_unico'],
-                        {'archivos_divididos': archivos_divididos}
-                    )
+                except Exception as e:
+                    print(f"   ❌ Error: {e}")
+                    documentos_con_error += 1
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
 
-            except Exception as e:
-                print(f"   ❌ Error: {e}")
-                documentos_con_error += 1
+            # Guardar lo que quede, también si el proceso se interrumpe
+            if pendientes:
+                guardadas, fallidas = self._guardar_lote(pendientes)
+                documentos_procesados += guardadas
+                documentos_con_error += fallidas
 
         print(f"\n📊 Resumen del procesamiento:")
         print(f"   ✅ Procesados exitosamente: {documentos_procesados}")
         print(f"   ❌ Con errores: {documentos_con_error}")
 
+    def _guardar_lote(self, lote: List[Dict]) -> Tuple[int, int]:
+        """
+        Guarda en la BD un lote de leyes en una sola transacción y lo vacía
+
+        Args:
+            lote: Metadatos de las leyes a guardar
+
+        Returns:
+            Tupla (leyes guardadas, leyes que no se pudieron guardar)
+        """
+        guardadas = self.db.insertar_leyes(lote)
+        fallidas = len(lote) - guardadas
+        print(f"\n   💾 {guardadas} leyes guardadas en BD")
+        lote.clear()
+        return guardadas, fallidas
+
     def exportar_datos(self, formatos: List[str] = None):
         """
         Exporta los datos a diferentes formatos
@@ -306,6 +430,12 @@ def main():
 
     parser.add_argument('--workers', type=int, default=5,
                        help='Número de hilos para scraping (default: 5)')
+    parser.add_argument('--solo-cambios', action='store_true',
+                       help='Omitir sitios cuyo listado no cambió desde el último scraping (HTTP 304)')
+    parser.add_argument('--procesos', type=int, default=None,
+                       help='Documentos a procesar en paralelo (default: uno por CPU, hasta 8)')
+    parser.add_argument('--reprocesar', action='store_true',
+                       help='Procesar también los documentos ya registrados en la BD')
     parser.add_argument('--ocr', action='store_true',
                        help='Aplicar OCR a documentos escaneados')
     parser.add_argument('--dividir-pdfs', action='store_true',
@@ -332,13 +462,18 @@ def main():
             buho.procesar_documentos(
                 directorio="data/raw/tcp_jurisprudencia",
                 aplicar_ocr=args.ocr,
-                dividir_pdfs=args.dividir_pdfs
+                dividir_pdfs=args.dividir_pdfs,
+                procesos=args.procesos,
+                reprocesar=args.reprocesar
             )
             buho.exportar_datos(formatos=args.formato)
 
         # Scraping individual
         if args.completo or args.scrapear:
-            buho.ejecutar_scraping_completo(max_workers=args.workers)
+            buho.ejecutar_scraping_completo(
+                max_workers=args.workers,
+                solo_cambios=args.solo_cambios
+            )
 
         if args.tcp:
             buho.ejecutar_scraping_tcp()
@@ -346,7 +481,9 @@ def main():
         if args.completo or args.procesar:
             buho.procesar_documentos(
                 aplicar_ocr=args.ocr,
-                dividir_pdfs=args.dividir_pdfs
+                dividir_pdfs=args.dividir_pdfs,
+                procesos=args.procesos,
+                reprocesar=args.reprocesar
             )
 
         if args.completo or args.exportar:
@@ -7,10 +7,22 @@ import sqlite3
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterable, Set
 import hashlib
 
 
+# Valores por consulta con IN (SQLite antiguo limita a 999 parámetros)
+_TAMANIO_LOTE_IN = 500
+
+# Filas que se leen del cursor a la vez al exportar
+_TAMANIO_LOTE_EXPORTACION = 500
+
+# Campos que se guardan como JSON
+_CAMPOS_JSON = ('materia', 'palabras_clave', 'archivos_divididos',
+                'errores_procesamiento', 'modifica_a', 'modificada_por',
+                'deroga_a', 'reglamentada_por', 'articulos_principales', 'anexos')
+
+
 class LawDatabase:
     """Gestor de base de datos SQLite para leyes bolivianas"""
 
@@ -174,6 +186,11 @@ class LawDatabase:
         CREATE INDEX IF NOT EXISTS idx_sitio_web ON leyes(sitio_web)
         """)
 
+        # Búsqueda de archivos ya registrados por contenido
+        self.cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_hash_md5 ON leyes(hash_md5)
+        """)
+
         self.conn.commit()
 
     def insertar_ley(self, metadata: Dict[str, Any]) -> Optional[int]:
@@ -187,16 +204,7 @@ class LawDatabase:
             ID de la ley insertada o None si falló
         """
         try:
-            # Generar código único si no existe
-            if 'codigo_unico' not in metadata:
-                metadata['codigo_unico'] = self._generar_codigo_unico(metadata)
-
-            # Convertir arrays y objetos a JSON
-            for campo in ['materia', 'palabras_clave', 'archivos_divididos',
-                         'errores_procesamiento', 'modifica_a', 'modificada_por',
-                         'deroga_a', 'reglamentada_por', 'articulos_principales', 'anexos']:
-                if campo in metadata and isinstance(metadata[campo], (list, dict)):
-                    metadata[campo] = json.dumps(metadata[campo], ensure_ascii=False)
+            self._preparar_para_insercion(metadata)
 
             # Preparar la consulta
             columnas = ', '.join(metadata.keys())
@@ -214,6 +222,83 @@ class LawDatabase:
             self.conn.rollback()
             return None
 
+    def insertar_leyes(self, lista_metadata: List[Dict[str, Any]]) -> int:
+        """
+        Inserta varias leyes en una sola transacción
+
+        Inserta todas las filas con un solo executemany y un único commit,
+        en lugar de una transacción por ley. Las filas van en el orden de
+        entrada y con las mismas columnas: si a una ley le falta una clave
+        que otra sí tiene, se usa el valor por defecto de la columna. Así el
+        resultado es el mismo que llamar a insertar_ley en bucle (con
+        códigos repetidos queda la última). Si el lote falla, se reintenta
+        ley por ley para que una fila inválida no descarte las demás.
+
+        Args:
+            lista_metadata: Lista de diccionarios con los metadatos de cada ley
+
+        Returns:
+            Número de leyes insertadas
+        """
+        if not lista_metadata:
+            return 0
+
+        for metadata in lista_metadata:
+            self._preparar_para_insercion(metadata)
+
+        columnas = list(dict.fromkeys(col for metadata in lista_metadata for col in metadata))
+
+        try:
+            faltantes = [col for col in columnas
+                         if any(col not in metadata for metadata in lista_metadata)]
+            por_defecto = self._valores_por_defecto(faltantes)
+            filas = [tuple(metadata[col] if col in metadata else por_defecto[col]
+                           for col in columnas)
+                     for metadata in lista_metadata]
+
+            placeholders = ', '.join('?' * len(columnas))
+            query = f"INSERT OR REPLACE INTO leyes ({', '.join(columnas)}) VALUES ({placeholders})"
+            self.cursor.executemany(query, filas)
+            self.conn.commit()
+            return len(lista_metadata)
+
+        except Exception as e:
+            print(f"Error al insertar el lote de leyes, se insertan una a una: {e}")
+            self.conn.rollback()
+            return sum(1 for metadata in lista_metadata
+                       if self.insertar_ley(metadata) is not None)
+
+    def _valores_por_defecto(self, columnas: List[str]) -> Dict[str, Any]:
+        """
+        Evalúa el DEFAULT de las columnas indicadas de la tabla leyes
+
+        Las columnas sin DEFAULT valen NULL, igual que si se omitieran en
+        el INSERT.
+        """
+        if not columnas:
+            return {}
+
+        self.cursor.execute("PRAGMA table_info(leyes)")
+        expresiones = {row['name']: row['dflt_value'] for row in self.cursor.fetchall()}
+
+        seleccion = ', '.join(expresiones.get(col) or 'NULL' for col in columnas)
+        self.cursor.execute(f"SELECT {seleccion}")
+        return dict(zip(columnas, self.cursor.fetchone()))
+
+    def _preparar_para_insercion(self, metadata: Dict[str, Any]):
+        """Completa el código único y serializa a JSON los campos de lista"""
+        # Generar código único si no existe
+        if 'codigo_unico' not in metadata:
+            metadata['codigo_unico'] = self._generar_codigo_unico(metadata)
+
+        self._serializar_campos_json(metadata)
+
+    def _serializar_campos_json(self, metadata: Dict[str, Any]):
+        """Convierte a JSON los arrays y objetos de los campos que lo requieren"""
+        for campo in _CAMPOS_JSON:
+            if campo in metadata and isinstance(metadata[campo], (list, dict)):
+                metadata[campo] = json.dumps(metadata[campo], ensure_ascii=False)
+
     def actualizar_ley(self, codigo_unico: str, metadata: Dict[str, Any]) -> bool:
         """
         Actualiza una ley existente
@@ -230,11 +315,7 @@ class LawDatabase:
             metadata['actualizado_en'] = datetime.now().isoformat()
 
             # Convertir arrays y objetos a JSON
-            for campo in ['materia', 'palabras_clave', 'archivos_divididos',
-                         'errores_procesamiento', 'modifica_a', 'modificada_por',
-                         'deroga_a', 'reglamentada_por', 'articulos_principales', 'anexos']:
-                if campo in metadata and isinstance(metadata[campo], (list, dict)):
-                    metadata[campo] = json.dumps(metadata[campo], ensure_ascii=False)
+            self._serializar_campos_json(metadata)
 
             # Preparar la consulta
             set_clause = ', '.join([f"{k} = ?" for k in metadata.keys()])
@@ -256,7 +337,8 @@ class LawDatabase:
         Busca leyes según criterios específicos
 
         Args:
-            **criterios: Pares clave-valor para buscar
+            **criterios: Pares clave-valor para buscar; sin criterios se
+                devuelven todas las leyes
 
         Returns:
             Lista de leyes que coinciden con los criterios
@@ -269,8 +351,9 @@ class LawDatabase:
                 where_clauses.append(f"{columna} = ?")
                 valores.append(valor)
 
-            where_str = ' AND '.join(where_clauses)
-            query = f"SELECT * FROM leyes WHERE {where_str}"
+            query = "SELECT * FROM leyes"
+            if where_clauses:
+                query += f" WHERE {' AND '.join(where_clauses)}"
 
             self.cursor.execute(query, valores)
             resultados = self.cursor.fetchall()
@@ -281,6 +364,33 @@ class LawDatabase:
             print(f"Error al buscar ley: {e}")
             return []
 
+    def hashes_registrados(self, hashes: Iterable[str]) -> Set[str]:
+        """
+        Indica cuáles de los hashes MD5 dados ya están registrados
+
+        Consulta por lotes con IN en lugar de hacer una consulta por
+        documento.
+
+        Args:
+            hashes: Hashes MD5 de los archivos
+
+        Returns:
+            Conjunto con los hashes que ya existen en la tabla de leyes
+        """
+        hashes = list(hashes)
+        registrados = set()
+
+        for inicio in range(0, len(hashes), _TAMANIO_LOTE_IN):
+            lote = hashes[inicio:inicio + _TAMANIO_LOTE_IN]
+            placeholders = ', '.join('?' * len(lote))
+            self.cursor.execute(
+                f"SELECT DISTINCT hash_md5 FROM leyes WHERE hash_md5 IN ({placeholders})",
+                lote
+            )
+            registrados.update(row['hash_md5'] for row in self.cursor.fetchall())
+
+        return registrados
+
     def obtener_estadisticas(self) -> Dict[str, Any]:
         """
         Obtiene estadísticas completas del scraping
@@ -438,20 +548,24 @@ class LawDatabase:
             valores = list(filtros.values())
 
         self.cursor.execute(query, valores)
-        resultados = self.cursor.fetchall()
+        primera = self.cursor.fetchone()
 
-        if not resultados:
+        if primera is None:
             print("No hay datos para exportar")
             return
 
-        # Escribir CSV
+        # Escribir CSV leyendo el cursor por lotes: el texto extraído de
+        # todas las leyes no llega a estar en memoria a la vez
         with open(ruta_salida, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=resultados[0].keys())
-            writer.writeheader()
-            for row in resultados:
-                writer.writerow(dict(row))
+            writer = csv.writer(f)
+            writer.writerow(primera.keys())
+            writer.writerow(primera)
+            total = 1
+            while lote := self.cursor.fetchmany(_TAMANIO_LOTE_EXPORTACION):
+                writer.writerows(lote)
+                total += len(lote)
 
-        print(f"Exportado {len(resultados)} registros a {ruta_salida}")
+        print(f"Exportado {total} registros a {ruta_salida}")
 
     def exportar_a_json(self, ruta_salida: str, filtros: Optional[Dict] = None):
         """
@@ -471,13 +585,21 @@ class LawDatabase:
             valores = list(filtros.values())
 
         self.cursor.execute(query, valores)
-        resultados = [dict(row) for row in self.cursor.fetchall()]
 
-        # Escribir JSON
+        # Escribir JSON ley por ley leyendo el cursor por lotes, con el
+        # mismo formato que json.dumps(lista, indent=2)
+        total = 0
         with open(ruta_salida, 'w', encoding='utf-8') as f:
-            json.dump(resultados, f, ensure_ascii=False, indent=2)
-
-        print(f"Exportado {len(resultados)} registros a {ruta_salida}")
+            f.write('[')
+            while lote := self.cursor.fetchmany(_TAMANIO_LOTE_EXPORTACION):
+                for row in lote:
+                    ley = json.dumps(dict(row), ensure_ascii=False, indent=2)
+                    f.write(',\n  ' if total else '\n  ')
+                    f.write(ley.replace('\n', '\n  '))
+                    total += 1
+            f.write('\n]' if total else ']')
+
+        print(f"Exportado {total} registros a {ruta_salida}")
 
     def cerrar(self):
         """Cierra la conexión con la base de datos"""
@@ -6,22 +6,316 @@ Procesa PDFs, DOCs, imágenes y aplica OCR cuando es necesario
 import os
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
 import hashlib
+import tempfile
+
+
+EXTENSIONES_DOC = frozenset({'.doc', '.docx'})
+EXTENSIONES_IMAGEN = frozenset({'.png', '.jpg', '.jpeg', '.tiff', '.bmp'})
+
+# Extracción de texto digital en paralelo: a partir de cuántas páginas
+# compensa arrancar procesos y cuántos usar como máximo (más allá de 4 la
+# ganancia de PyMuPDF es marginal)
+_MIN_PAGINAS_EXTRACCION_PARALELA = 50
+_MAX_WORKERS_EXTRACCION = 4
+
+# Por debajo de estos caracteres, una página con imágenes de un PDF con
+# texto se considera escaneada y se le aplica OCR
+_MIN_CARACTERES_PAGINA = 50
+
+# Configuración de Tesseract: solo el motor LSTM y cada página como un
+# bloque de texto uniforme, que es como vienen las normas (sin el análisis
+# automático de layout)
+_IDIOMA_OCR = 'spa'
+_CONFIG_TESSERACT = '--oem 1 --psm 6'
+
+# Resolución para rasterizar páginas antes del OCR; se puede cambiar con la
+# variable de entorno OCR_DPI o el parámetro ocr_dpi del procesador
+_DPI_OCR_POR_DEFECTO = 300
+
+
+def _es_pdf(ruta: str) -> bool:
+    """
+    Comprueba la firma %PDF- en la cabecera del archivo
+
+    Permite descartar sin abrirlos con ningún parser los archivos guardados
+    como .pdf que en realidad son otra cosa (p. ej. una página HTML de
+    error). La especificación admite bytes previos dentro del primer KB.
+    """
+    with open(ruta, 'rb') as f:
+        return b'%PDF-' in f.read(1024)
+
+
+def _confianza_media(confianzas: List) -> Optional[float]:
+    """
+    Calcula la confianza media de las palabras reconocidas por Tesseract
+
+    Args:
+        confianzas: Columna 'conf' de image_to_data (int, float o str
+            según la versión de pytesseract; -1 marca bloques sin texto)
+
+    Returns:
+        Confianza media o None si no hay palabras reconocidas
+    """
+    import numpy as np
+
+    valores = np.asarray(confianzas, dtype=float)
+    valores = valores[valores >= 0]
+    if valores.size == 0:
+        return None
+    return float(valores.mean())
+
+
+def _preprocesar_imagen(imagen):
+    """Preprocesa una imagen para mejorar el OCR"""
+    # Las imágenes de 1 bit (p. ej. TIFF de escáner en blanco y negro) ya
+    # están binarizadas: filtrarlas solo cuesta tiempo
+    if getattr(imagen, 'mode', None) == '1':
+        return imagen.convert('L')
+
+    try:
+        import cv2
+        import numpy as np
+        from PIL import Image
+
+        # Convertir PIL a OpenCV
+        img_array = np.array(imagen)
+        if len(img_array.shape) == 3:
+            img_gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+        else:
+            img_gray = img_array
+
+        # Aplicar filtros para mejorar calidad
+        # 1. Eliminar ruido
+        img_denoised = cv2.fastNlMeansDenoising(img_gray, h=10)
+
+        # 2. Aumentar contraste
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        img_enhanced = clahe.apply(img_denoised)
+
+        # 3. Binarización adaptativa
+        img_binary = cv2.adaptiveThreshold(
+            img_enhanced, 255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY, 11, 2
+        )
+
+        # Convertir de vuelta a PIL
+        return Image.fromarray(img_binary)
+
+    except Exception as e:
+        print(f"Error en preprocesamiento: {e}")
+        return imagen
+
+
+# API de tesserocr de este proceso: None = sin inicializar, False = no disponible
+_api_tesserocr = None
+
+
+def _obtener_api_tesserocr():
+    """Devuelve la API de tesserocr del proceso o None si no está instalado"""
+    global _api_tesserocr
+
+    if _api_tesserocr is None:
+        try:
+            import tesserocr
+            # El modelo de idioma se carga una sola vez por proceso
+            _api_tesserocr = tesserocr.PyTessBaseAPI(lang=_IDIOMA_OCR,
+                                                     psm=tesserocr.PSM.SINGLE_BLOCK,
+                                                     oem=tesserocr.OEM.LSTM_ONLY)
+        except Exception:
+            _api_tesserocr = False
+
+    return _api_tesserocr or None
+
+
+def _reconocer_imagen(imagen) -> Tuple[str, Optional[float]]:
+    """
+    Aplica OCR a una imagen ya preprocesada
+
+    Usa tesserocr (libtesseract en proceso) si está instalado y, si no,
+    pytesseract, que lanza un proceso de tesseract por llamada.
+
+    Args:
+        imagen: Imagen PIL
+
+    Returns:
+        Tupla (texto, confianza media o None)
+    """
+    api = _obtener_api_tesserocr()
+    if api is not None:
+        api.SetImage(imagen)
+        return api.GetUTF8Text(), _confianza_media(api.AllWordConfidences())
+
+    import pytesseract
+
+    # Una sola ejecución de tesseract: pytesseract guarda la imagen en un
+    # archivo temporal y lanza un proceso por llamada, así que el texto se
+    # reconstruye a partir de image_to_data en lugar de llamar también a
+    # image_to_string
+    data = pytesseract.image_to_data(imagen, lang=_IDIOMA_OCR, config=_CONFIG_TESSERACT,
+                                     output_type=pytesseract.Output.DICT)
+
+    return _texto_desde_datos(data), _confianza_media(data['conf'])
+
+
+def _texto_desde_datos(data: Dict) -> str:
+    """
+    Reconstruye el texto reconocido a partir de la salida de image_to_data
+
+    Args:
+        data: Diccionario de pytesseract.image_to_data (Output.DICT)
+
+    Returns:
+        Texto con una línea por línea detectada y una línea en blanco
+        entre párrafos
+    """
+    lineas = []
+    palabras = []
+    linea_actual = None
+
+    for bloque, parrafo, linea, palabra in zip(data['block_num'], data['par_num'],
+                                                data['line_num'], data['text']):
+        if not palabra or not palabra.strip():
+            continue
+
+        if (bloque, parrafo, linea) != linea_actual:
+            if palabras:
+                lineas.append(' '.join(palabras))
+                # Cambio de párrafo o bloque: separar con línea en blanco
+                if (bloque, parrafo) != linea_actual[:2]:
+                    lineas.append('')
+            palabras = []
+            linea_actual = (bloque, parrafo, linea)
+
+        palabras.append(palabra)
+
+    if palabras:
+        lineas.append(' '.join(palabras))
+
+    return '\n'.join(lineas)
+
+
+def _ocr_pagina(pagina, dpi: int = _DPI_OCR_POR_DEFECTO) -> Tuple[str, Optional[float]]:
+    """
+    Rasteriza una página de PyMuPDF y le aplica OCR
+
+    Args:
+        pagina: Página de un fitz.Document abierto
+        dpi: Resolución de rasterizado
+
+    Returns:
+        Tupla (texto, confianza media o None)
+    """
+    import fitz  # PyMuPDF
+    from PIL import Image
+
+    # PyMuPDF rasteriza en memoria, sin lanzar pdftoppm ni escribir la
+    # imagen a disco; en escala de grises, que es lo que usa el preprocesado
+    pixmap = pagina.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    imagen = Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+
+    # Preprocesar imagen y aplicar OCR
+    return _reconocer_imagen(_preprocesar_imagen(imagen))
+
+
+def _ocr_pagina_pdf(pdf_path: str, numero_pagina: int,
+                    dpi: int = _DPI_OCR_POR_DEFECTO) -> Tuple[str, Optional[float]]:
+    """
+    Abre un PDF y aplica OCR a una de sus páginas
+
+    Función de módulo para poder ejecutarse en un ProcessPoolExecutor: cada
+    proceso abre su propio documento y solo mantiene en memoria la imagen
+    de su página.
+
+    Args:
+        pdf_path: Ruta al PDF
+        numero_pagina: Número de página (empezando en 1)
+        dpi: Resolución de rasterizado
+
+    Returns:
+        Tupla (texto, confianza media o None)
+    """
+    import fitz  # PyMuPDF
+
+    with fitz.open(pdf_path) as doc:
+        return _ocr_pagina(doc[numero_pagina - 1], dpi)
+
+
+def _extraer_texto_rango(pdf_path: str, inicio: int, fin: int) -> List[str]:
+    """
+    Extrae con PyMuPDF el texto de las páginas [inicio, fin) de un PDF
+
+    Cada proceso abre su propio documento: un fitz.Document no se puede
+    compartir entre procesos.
+    """
+    import fitz  # PyMuPDF
+
+    with fitz.open(pdf_path) as doc:
+        return [doc[numero].get_text() for numero in range(inicio, fin)]
+
+
+@lru_cache(maxsize=4096)
+def _tiene_capa_texto(pdf_path: str, mtime_ns: int, tamanio: int,
+                      minimo_caracteres: int) -> bool:
+    """
+    Comprueba si un PDF supera un mínimo de caracteres en su capa de texto
+
+    Lee página a página y se detiene en cuanto supera el mínimo, sin
+    extraer el documento completo ni aplicar OCR. La fecha de modificación
+    y el tamaño solo forman parte de la clave de la caché: si el archivo
+    cambia, se vuelve a analizar.
+    """
+    import fitz  # PyMuPDF
+
+    # PyMuPDF lee la capa de texto sin calcular el layout de pdfplumber
+    total_caracteres = 0
+    with fitz.open(pdf_path) as doc:
+        for pagina in doc:
+            total_caracteres += len(pagina.get_text().strip())
+            if total_caracteres > minimo_caracteres:
+                return True
+
+    return False
+
+
+def _inicializar_worker_ocr():
+    """
+    Limita Tesseract a un hilo en cada proceso del pool de OCR
+
+    Con varias páginas en paralelo, los hilos OpenMP de Tesseract compiten
+    por los mismos núcleos y el conjunto resulta más lento. Se respeta un
+    OMP_THREAD_LIMIT definido por el usuario.
+    """
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
 
 
 class DocumentProcessor:
     """Procesador completo de documentos legales"""
 
-    def __init__(self, output_dir: str = "data/processed"):
+    def __init__(self, output_dir: str = "data/processed",
+                 ocr_workers: Optional[int] = None,
+                 ocr_dpi: Optional[int] = None):
         """
         Inicializa el procesador de documentos
 
         Args:
             output_dir: Directorio para archivos procesados
+            ocr_workers: Procesos para aplicar OCR (y extraer el texto de PDFs
+                largos) por páginas en paralelo (por defecto, uno por CPU;
+                1 desactiva el pool)
+            ocr_dpi: Resolución para rasterizar las páginas a las que se
+                aplica OCR (por defecto, OCR_DPI o 300); menos DPI acelera
+                Tesseract a costa de precisión en letra pequeña
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.ocr_confidence = 0.0
+        self.ocr_workers = ocr_workers or os.cpu_count() or 1
+        self.ocr_dpi = ocr_dpi or int(os.environ.get('OCR_DPI', _DPI_OCR_POR_DEFECTO))
 
     def procesar_documento(self, archivo_path: str) -> Dict:
         """
@@ -49,9 +343,9 @@ class DocumentProcessor:
         try:
             if extension == '.pdf':
                 resultado.update(self._procesar_pdf(archivo_path))
-            elif extension in ['.doc', '.docx']:
+            elif extension in EXTENSIONES_DOC:
                 resultado.update(self._procesar_doc(archivo_path))
-            elif extension in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
+            elif extension in EXTENSIONES_IMAGEN:
                 resultado.update(self._procesar_imagen(archivo_path))
             elif extension == '.txt':
                 resultado.update(self._procesar_texto(archivo_path))
@@ -66,56 +360,127 @@ class DocumentProcessor:
     def _procesar_pdf(self, pdf_path: str) -> Dict:
         """Procesa un archivo PDF extrayendo texto"""
         try:
-            import pdfplumber
-            from PyPDF2 import PdfReader
-
             resultado = {'exito': False, 'texto': '', 'numero_paginas': 0}
 
-            # Intentar con pdfplumber primero (mejor extracción)
-            try:
-                with pdfplumber.open(pdf_path) as pdf:
-                    resultado['numero_paginas'] = len(pdf.pages)
-                    texto_completo = []
-
-                    for pagina in pdf.pages:
-                        texto = pagina.extract_text()
-                        if texto:
-                            texto_completo.append(texto)
-
-                    resultado['texto'] = '\n'.join(texto_completo)
-                    resultado['exito'] = True
-
-                    # Si no se extrajo texto, aplicar OCR
-                    if len(resultado['texto'].strip()) < 100:
-                        print(f"Poco texto extraído de {pdf_path}, aplicando OCR...")
-                        resultado_ocr = self._aplicar_ocr_a_pdf(pdf_path)
-                        resultado.update(resultado_ocr)
-
-            except Exception as e:
-                print(f"Error con pdfplumber, intentando PyPDF2: {e}")
-                # Fallback a PyPDF2
-                reader = PdfReader(pdf_path)
-                resultado['numero_paginas'] = len(reader.pages)
-                texto_completo = []
-
-                for pagina in reader.pages:
-                    texto = pagina.extract_text()
-                    if texto:
-                        texto_completo.append(texto)
-
-                resultado['texto'] = '\n'.join(texto_completo)
+            if not _es_pdf(pdf_path):
+                raise ValueError(f"{pdf_path} no es un PDF válido")
+
+            # PyMuPDF extrae el texto en C sin construir el layout completo;
+            # pdfplumber y PyPDF2 quedan como alternativas
+            extractores = (
+                ('PyMuPDF', self._extraer_texto_pymupdf),
+                ('pdfplumber', self._extraer_texto_pdfplumber),
+                ('PyPDF2', self._extraer_texto_pypdf2),
+            )
+
+            for nombre, extractor in extractores:
+                try:
+                    textos, resultado['numero_paginas'] = extractor(pdf_path)
+                    break
+                except Exception as e:
+                    print(f"Error con {nombre}: {e}")
+            else:
+                raise RuntimeError(f"No se pudo extraer texto de {pdf_path}")
+
+            textos = [texto or '' for texto in textos]
+
+            # Si no se extrajo texto, aplicar OCR (se mide por página para
+            # no copiar el texto completo solo para descontar los blancos)
+            if sum(len(texto.strip()) for texto in textos) < 100:
+                print(f"Poco texto extraído de {pdf_path}, aplicando OCR...")
+                # El número de páginas ya se conoce: no reabrir el PDF
+                resultado['texto'] = '\n'.join(texto for texto in textos if texto)
                 resultado['exito'] = True
+                resultado_ocr = self._aplicar_ocr_a_pdf(pdf_path, resultado['numero_paginas'])
+                resultado.update(resultado_ocr)
+                return resultado
 
-                # Si no hay texto, aplicar OCR
-                if len(resultado['texto'].strip()) < 100:
-                    resultado_ocr = self._aplicar_ocr_a_pdf(pdf_path)
-                    resultado.update(resultado_ocr)
+            # PDFs mixtos (p. ej. portada digital y cuerpo escaneado): OCR
+            # solo de las páginas sin capa de texto
+            self._aplicar_ocr_a_paginas_escaneadas(pdf_path, textos, resultado)
+
+            resultado['texto'] = '\n'.join(texto for texto in textos if texto)
+            resultado['exito'] = True
 
             return resultado
 
         except Exception as e:
             return {'exito': False, 'error': str(e), 'texto': '', 'numero_paginas': 0}
 
+    def _aplicar_ocr_a_paginas_escaneadas(self, pdf_path: str, textos: List[str],
+                                          resultado: Dict):
+        """
+        Aplica OCR a las páginas escaneadas de un PDF que sí tiene texto
+
+        Una página cuenta como escaneada si casi no tiene texto y contiene
+        alguna imagen; así las páginas en blanco no pasan por Tesseract.
+        Reemplaza en `textos` el texto de esas páginas y actualiza en
+        `resultado` los campos del OCR. Si el OCR falla, se conserva el
+        texto digital.
+
+        Args:
+            pdf_path: Ruta al PDF
+            textos: Texto extraído de cada página
+            resultado: Resultado del procesamiento del PDF
+        """
+        candidatas = [numero for numero, texto in enumerate(textos, start=1)
+                      if len(texto.strip()) < _MIN_CARACTERES_PAGINA]
+        if not candidatas:
+            return
+
+        try:
+            import fitz  # PyMuPDF
+
+            with fitz.open(pdf_path) as doc:
+                escaneadas = [numero for numero in candidatas if doc[numero - 1].get_images()]
+            if not escaneadas:
+                return
+
+            print(f"{len(escaneadas)} páginas escaneadas en {pdf_path}, aplicando OCR...")
+            paginas_ocr = self._ocr_paginas(pdf_path, escaneadas)
+
+        except Exception as e:
+            print(f"Error al aplicar OCR a las páginas escaneadas: {e}")
+            return
+
+        for numero, (texto, _) in zip(escaneadas, paginas_ocr):
+            textos[numero - 1] = texto
+
+        confianzas = [conf for _, conf in paginas_ocr if conf is not None]
+        resultado['ocr_aplicado'] = True
+        resultado['confianza_ocr'] = sum(confianzas) / len(confianzas) if confianzas else 0.0
+
+    def _extraer_texto_pymupdf(self, pdf_path: str) -> Tuple[List[str], int]:
+        """Extrae el texto de cada página con PyMuPDF"""
+        import fitz  # PyMuPDF
+
+        with fitz.open(pdf_path) as doc:
+            total_paginas = doc.page_count
+            workers = min(self.ocr_workers, _MAX_WORKERS_EXTRACCION, total_paginas)
+            if workers < 2 or total_paginas < _MIN_PAGINAS_EXTRACCION_PARALELA:
+                return [pagina.get_text() for pagina in doc], total_paginas
+
+        # PDFs largos: rangos contiguos de páginas en varios procesos; en
+        # documentos cortos arrancar el pool cuesta más de lo que se gana
+        limites = [total_paginas * i // workers for i in range(workers + 1)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rangos = pool.map(_extraer_texto_rango, repeat(pdf_path), limites[:-1], limites[1:])
+            return [texto for rango in rangos for texto in rango], total_paginas
+
+    def _extraer_texto_pdfplumber(self, pdf_path: str) -> Tuple[List[str], int]:
+        """Extrae el texto de cada página con pdfplumber"""
+        import pdfplumber
+
+        with pdfplumber.open(pdf_path) as pdf:
+            return [pagina.extract_text() for pagina in pdf.pages], len(pdf.pages)
+
+    def _extraer_texto_pypdf2(self, pdf_path: str) -> Tuple[List[str], int]:
+        """Extrae el texto de cada página con PyPDF2"""
+        from PyPDF2 import PdfReader
+
+        reader = PdfReader(pdf_path)
+        return [pagina.extract_text() for pagina in reader.pages], len(reader.pages)
+
     def _procesar_doc(self, doc_path: str) -> Dict:
         """Procesa un archivo DOC/DOCX"""
         try:
@@ -153,8 +518,7 @@ class DocumentProcessor:
     def _procesar_texto(self, txt_path: str) -> Dict:
         """Procesa un archivo de texto plano"""
         try:
-            with open(txt_path, 'r', encoding='utf-8') as f:
-                texto = f.read()
+            texto = Path(txt_path).read_text(encoding='utf-8')
 
             return {
                 'exito': True,
@@ -166,12 +530,20 @@ class DocumentProcessor:
         except Exception as e:
             return {'exito': False, 'error': str(e), 'texto': '', 'numero_paginas': 0}
 
-    def _aplicar_ocr_a_pdf(self, pdf_path: str) -> Dict:
-        """Aplica OCR a un PDF escaneado"""
+    def _aplicar_ocr_a_pdf(self, pdf_path: str, total_paginas: Optional[int] = None) -> Dict:
+        """
+        Aplica OCR a un PDF escaneado
+
+        Args:
+            pdf_path: Ruta al PDF
+            total_paginas: Número de páginas si ya se conoce; si no, se
+                abre el PDF para contarlas
+
+        Returns:
+            Diccionario con el texto reconocido y la confianza media
+        """
         try:
-            from pdf2image import convert_from_path
-            import pytesseract
-            from PIL import Image
+            import fitz  # PyMuPDF
 
             resultado = {
                 'texto': '',
@@ -180,31 +552,19 @@ class DocumentProcessor:
                 'exito': False
             }
 
-            # Convertir PDF a imágenes
-            imagenes = convert_from_path(pdf_path, dpi=300)
-            textos = []
-            confianzas = []
-
-            for i, imagen in enumerate(imagenes):
-                # Preprocesar imagen
-                imagen_procesada = self._preprocesar_imagen(imagen)
-
-                # Aplicar OCR con Tesseract
-                config_tesseract = '--oem 3 --psm 6 -l spa'
-                texto = pytesseract.image_to_string(imagen_procesada, config=config_tesseract)
+            if not total_paginas:
+                with fitz.open(pdf_path) as doc:
+                    total_paginas = doc.page_count
 
-                # Obtener confianza
-                data = pytesseract.image_to_data(imagen_procesada, output_type=pytesseract.Output.DICT)
-                confidencias_pagina = [float(conf) for conf in data['conf'] if conf != '-1']
-                if confidencias_pagina:
-                    confianzas.append(sum(confidencias_pagina) / len(confidencias_pagina))
+            paginas_ocr = self._ocr_paginas(pdf_path, range(1, total_paginas + 1))
 
-                textos.append(texto)
+            textos = [texto for texto, _ in paginas_ocr]
+            confianzas = [conf for _, conf in paginas_ocr if conf is not None]
 
             resultado['texto'] = '\n\n'.join(textos)
             resultado['confianza_ocr'] = sum(confianzas) / len(confianzas) if confianzas else 0.0
             resultado['exito'] = True
-            resultado['numero_paginas'] = len(imagenes)
+            resultado['numero_paginas'] = total_paginas
 
             return resultado
 
@@ -218,10 +578,35 @@ class DocumentProcessor:
                 'error': str(e)
             }
 
+    def _ocr_paginas(self, pdf_path: str, paginas) -> List[Tuple[str, Optional[float]]]:
+        """
+        Aplica OCR a varias páginas de un PDF
+
+        Args:
+            pdf_path: Ruta al PDF
+            paginas: Números de página (empezando en 1)
+
+        Returns:
+            Lista de tuplas (texto, confianza media o None), en el mismo orden
+        """
+        import fitz  # PyMuPDF
+
+        # Tesseract es CPU-bound: cada página se rasteriza y reconoce en
+        # su propio proceso, sin cargar todas las imágenes a la vez
+        workers = min(self.ocr_workers, len(paginas))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_inicializar_worker_ocr) as pool:
+                return list(pool.map(_ocr_pagina_pdf, repeat(pdf_path), paginas,
+                                     repeat(self.ocr_dpi)))
+
+        # En serie basta con abrir el PDF una vez para todas las páginas
+        with fitz.open(pdf_path) as doc:
+            return [_ocr_pagina(doc[numero - 1], self.ocr_dpi) for numero in paginas]
+
     def _aplicar_ocr_a_imagen(self, imagen_path: str) -> Dict:
         """Aplica OCR a una imagen"""
         try:
-            import pytesseract
             from PIL import Image
 
             resultado = {
@@ -235,16 +620,11 @@ class DocumentProcessor:
             imagen = Image.open(imagen_path)
             imagen_procesada = self._preprocesar_imagen(imagen)
 
-            # Aplicar OCR
-            config_tesseract = '--oem 3 --psm 6 -l spa'
-            texto = pytesseract.image_to_string(imagen_procesada, config=config_tesseract)
-
-            # Calcular confianza
-            data = pytesseract.image_to_data(imagen_procesada, output_type=pytesseract.Output.DICT)
-            confidencias = [float(conf) for conf in data['conf'] if conf != '-1']
+            # Aplicar OCR y calcular confianza
+            texto, confianza = _reconocer_imagen(imagen_procesada)
 
             resultado['texto'] = texto
-            resultado['confianza_ocr'] = sum(confidencias) / len(confidencias) if confidencias else 0.0
+            resultado['confianza_ocr'] = confianza if confianza is not None else 0.0
             resultado['exito'] = True
 
             return resultado
@@ -261,39 +641,7 @@ class DocumentProcessor:
 
     def _preprocesar_imagen(self, imagen):
         """Preprocesa una imagen para mejorar el OCR"""
-        try:
-            import cv2
-            import numpy as np
-            from PIL import Image
-
-            # Convertir PIL a OpenCV
-            img_array = np.array(imagen)
-            if len(img_array.shape) == 3:
-                img_gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-            else:
-                img_gray = img_array
-
-            # Aplicar filtros para mejorar calidad
-            # 1. Eliminar ruido
-            img_denoised = cv2.fastNlMeansDenoising(img_gray, h=10)
-
-            # 2. Aumentar contraste
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            img_enhanced = clahe.apply(img_denoised)
-
-            # 3. Binarización adaptativa
-            img_binary = cv2.adaptiveThreshold(
-                img_enhanced, 255,
-                cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv2.THRESH_BINARY, 11, 2
-            )
-
-            # Convertir de vuelta a PIL
-            return Image.fromarray(img_binary)
-
-        except Exception as e:
-            print(f"Error en preprocesamiento: {e}")
-            return imagen
+        return _preprocesar_imagen(imagen)
 
     def normalizar_documento(self, archivo_path: str) -> Optional[str]:
         """
@@ -314,9 +662,12 @@ class DocumentProcessor:
 
         try:
             if extension == '.pdf':
+                if not _es_pdf(archivo_path):
+                    print(f"El archivo no es un PDF válido: {archivo_path}")
+                    return None
+
                 # Ya es PDF, solo verificar si tiene texto
-                resultado = self._procesar_pdf(archivo_path)
-                if len(resultado['texto'].strip()) > 100:
+                if self._pdf_tiene_texto(archivo_path):
                     # Tiene texto, copiar el archivo
                     import shutil
                     shutil.copy2(archivo_path, archivo_normalizado)
@@ -325,11 +676,11 @@ class DocumentProcessor:
                     # No tiene texto, aplicar OCR y crear PDF buscable
                     return self._crear_pdf_buscable(archivo_path, archivo_normalizado)
 
-            elif extension in ['.doc', '.docx']:
+            elif extension in EXTENSIONES_DOC:
                 # Convertir DOC a PDF
                 return self._convertir_doc_a_pdf(archivo_path, archivo_normalizado)
 
-            elif extension in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
+            elif extension in EXTENSIONES_IMAGEN:
                 # Crear PDF desde imagen con OCR
                 return self._crear_pdf_desde_imagen(archivo_path, archivo_normalizado)
 
@@ -341,27 +692,50 @@ class DocumentProcessor:
             print(f"Error al normalizar documento: {e}")
             return None
 
+    def _pdf_tiene_texto(self, pdf_path: str, minimo_caracteres: int = 100) -> bool:
+        """
+        Indica si un PDF tiene capa de texto (es digital y no escaneado)
+
+        El resultado se cachea por ruta, fecha de modificación y tamaño, así
+        que un PDF ya clasificado no se vuelve a abrir mientras no cambie.
+
+        Args:
+            pdf_path: Ruta al PDF
+            minimo_caracteres: Caracteres no blancos necesarios
+
+        Returns:
+            True si el PDF supera el mínimo de texto
+        """
+        estado = os.stat(pdf_path)
+        return _tiene_capa_texto(str(pdf_path), estado.st_mtime_ns, estado.st_size,
+                                 minimo_caracteres)
+
     def _crear_pdf_buscable(self, pdf_path: str, output_path: str) -> Optional[str]:
         """Crea un PDF buscable desde un PDF escaneado usando OCR"""
         try:
             from pdf2image import convert_from_path
-            from reportlab.pdfgen import canvas
-            from reportlab.lib.pagesizes import letter
-            from PIL import Image
             import pytesseract
+            import fitz  # PyMuPDF
+
+            # pdftoppm solo reparte las páginas entre hilos cuando escribe a
+            # un directorio; las imágenes se leen de disco al usarlas
+            with fitz.open() as salida, tempfile.TemporaryDirectory() as directorio_temporal:
+                imagenes = convert_from_path(pdf_path, dpi=300,
+                                             output_folder=directorio_temporal,
+                                             thread_count=self.ocr_workers)
+
+                for imagen in imagenes:
+                    # Tesseract genera directamente la página con la imagen y la
+                    # capa de texto invisible; solo hay que concatenar las páginas
+                    pagina_pdf = pytesseract.image_to_pdf_or_hocr(
+                        imagen, extension='pdf', lang=_IDIOMA_OCR, config=_CONFIG_TESSERACT
+                    )
+                    imagen.close()
+                    with fitz.open(stream=pagina_pdf, filetype='pdf') as pagina:
+                        salida.insert_pdf(pagina)
+
+                salida.save(str(output_path))
 
-            imagenes = convert_from_path(pdf_path, dpi=300)
-            c = canvas.Canvas(str(output_path), pagesize=letter)
-
-            for imagen in imagenes:
-                # Aplicar OCR
-                texto = pytesseract.image_to_string(imagen, lang='spa')
-
-                # Agregar texto invisible en el PDF
-                c.drawString(100, 750, "")  # Placeholder
-                c.showPage()
-
-            c.save()
             return str(output_path)
 
         except Exception as e:
@@ -5,15 +5,147 @@ Extrae automáticamente metadatos completos de leyes y documentos jurídicos bol
 
 import re
 import hashlib
+from collections import Counter
+from itertools import islice
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 import yaml
 
 
+# Patrones compilados una sola vez al importar el módulo
+# Con IGNORECASE las variantes en mayúsculas ('LEY', 'DECRETO SUPREMO')
+# son el mismo patrón y solo repetían la búsqueda
+_PATRONES_NUMERO_LEY = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'Ley\s+N[°º]?\s*(\d+)',
+    r'D\.?S\.?\s+N[°º]?\s*(\d+)',
+    r'Decreto\s+Supremo\s+N[°º]?\s*(\d+)',
+    r'Resolución\s+(?:Ministerial|Administrativa)\s+N[°º]?\s*(\d+)',
+    r'Sentencia\s+Constitucional\s+N[°º]?\s*(\d+/\d+)',
+))
+_PATRONES_TITULO = tuple(re.compile(p, re.IGNORECASE | re.DOTALL) for p in (
+    r'Ley\s+N[°º]?\s*\d+\s*[:\-]?\s*(.+?)(?:\n|$)',
+    r'DECRETO\s+SUPREMO\s+N[°º]?\s*\d+\s*[:\-]?\s*(.+?)(?:\n|$)',
+    r'(?:LEY|DECRETO|RESOLUCIÓN).*?\n\s*(.+?)(?:\n\n|$)',
+))
+_PATRONES_FIRMANTE = tuple(re.compile(p) for p in (
+    r'(?:Fdo\.|Firmado|Refrendado)\s*[:.]?\s*([A-ZÁÉÍÓÚ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚ][a-záéíóúñ]+)+)',
+    r'Presidente(?:\s+Constitucional)?\s*[:.]?\s*([A-ZÁÉÍÓÚ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚ][a-záéíóúñ]+)+)',
+))
+_PATRON_ESPACIOS = re.compile(r'\s+')
+_PATRON_FECHA = re.compile(r'(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})', re.IGNORECASE)
+_PATRON_ABROGACION = re.compile(r'abroga|derog|sin efecto', re.IGNORECASE)
+_PATRON_PALABRA = re.compile(r'\b[a-záéíóúñ]{4,}\b')
+_PATRON_ARTICULO = re.compile(
+    r'Art[íi]culo\s+(\d+)[°º]?\s*[:\-.]?\s*(.*?)(?=Art[íi]culo\s+\d+|$)',
+    re.IGNORECASE | re.DOTALL
+)
+_PATRON_MODIFICA = re.compile(r'modifica(?:ndo)?\s+(?:la\s+)?Ley\s+N?[°º]?\s*(\d+)', re.IGNORECASE)
+_PATRON_DEROGA = re.compile(r'deroga(?:ndo)?\s+(?:la\s+)?Ley\s+N?[°º]?\s*(\d+)', re.IGNORECASE)
+_PATRON_REGLAMENTA = re.compile(r'reglamenta(?:ndo)?\s+(?:la\s+)?Ley\s+N?[°º]?\s*(\d+)', re.IGNORECASE)
+
+# Tamaño de bloque para calcular los hashes de archivo sin cargarlo entero
+_TAMANIO_BLOQUE_HASH = 1024 * 1024
+
+
+def calcular_hashes_archivo(archivo_path, algoritmos=('md5', 'sha256')) -> Dict[str, str]:
+    """
+    Calcula los hashes de un archivo en una sola lectura por bloques
+
+    Args:
+        archivo_path: Ruta al archivo
+        algoritmos: Nombres de algoritmos de hashlib
+
+    Returns:
+        Diccionario {algoritmo: hash en hexadecimal}
+    """
+    hashes = {algoritmo: hashlib.new(algoritmo) for algoritmo in algoritmos}
+    with open(archivo_path, 'rb') as f:
+        while bloque := f.read(_TAMANIO_BLOQUE_HASH):
+            for h in hashes.values():
+                h.update(bloque)
+
+    return {algoritmo: h.hexdigest() for algoritmo, h in hashes.items()}
+
+
 class MetadataExtractor:
     """Extractor inteligente de metadatos de documentos legales"""
 
+    # Tablas de clasificación: constantes de clase para no reconstruirlas
+    # en cada documento procesado
+    TIPOS_NORMA = {
+        'Constitución': ('CONSTITUCIÓN', 'CONSTITUCIONAL POLÍTICA'),
+        'Ley': ('LEY N°', 'LEY N', 'LEY Nº'),
+        'Decreto Supremo': ('DECRETO SUPREMO', 'D.S.', 'DS N'),
+        'Decreto Ley': ('DECRETO LEY',),
+        'Resolución Ministerial': ('RESOLUCIÓN MINISTERIAL', 'R.M.'),
+        'Resolución Administrativa': ('RESOLUCIÓN ADMINISTRATIVA', 'R.A.'),
+        'Sentencia Constitucional': ('SENTENCIA CONSTITUCIONAL',),
+        'Ordenanza Municipal': ('ORDENANZA MUNICIPAL',),
+        'Reglamento': ('REGLAMENTO',),
+        'Código': ('CÓDIGO',)
+    }
+
+    ORGANOS_EMISORES = (
+        'Asamblea Legislativa Plurinacional',
+        'Congreso Nacional',
+        'Poder Ejecutivo',
+        'Tribunal Constitucional Plurinacional',
+        'Órgano Judicial',
+        'Ministerio',
+        'Gobierno Municipal',
+        'Gobierno Departamental'
+    )
+
+    AREAS_POR_SITIO = {
+        'Tribunal Constitucional': 'Constitucional',
+        'Ministerio de Trabajo': 'Laboral',
+        'Ministerio de Salud': 'Salud',
+        'Ministerio de Educación': 'Educación',
+        'Ministerio de Medio Ambiente': 'Ambiental',
+        'Ministerio de Minería': 'Minero',
+        'Ministerio de Hidrocarburos': 'Hidrocarburos',
+        'INRA': 'Agrario',
+        'Impuestos': 'Tributario',
+        'Aduana': 'Aduanero',
+        'Fiscalía': 'Penal',
+        'Contraloría': 'Administrativo'
+    }
+
+    # Versiones en minúsculas de las tablas anteriores, calculadas una sola
+    # vez para comparar contra el texto ya pasado a minúsculas
+    _ORGANOS_EMISORES_MINUSCULAS = tuple((organo.lower(), organo) for organo in ORGANOS_EMISORES)
+    _AREAS_POR_SITIO_MINUSCULAS = tuple((clave.lower(), area) for clave, area in AREAS_POR_SITIO.items())
+
+    AREAS_POR_PALABRAS = {
+        'Constitucional': ('constitución', 'constitucional', 'derechos fundamentales'),
+        'Penal': ('penal', 'delito', 'pena', 'prisión', 'sanción penal'),
+        'Laboral': ('laboral', 'trabajo', 'trabajador', 'empleador', 'salario', 'contrato de trabajo'),
+        'Tributario': ('tributario', 'impuesto', 'tributo', 'fiscal'),
+        'Ambiental': ('ambiental', 'medio ambiente', 'ecológico', 'recursos naturales'),
+        'Minero': ('minero', 'minería', 'explotación minera', 'yacimiento'),
+        'Administrativo': ('administrativo', 'administración pública', 'servidor público'),
+        'Civil': ('civil', 'contrato', 'obligación', 'responsabilidad civil'),
+        'Comercial': ('comercial', 'comercio', 'mercantil', 'empresa'),
+    }
+
+    JERARQUIAS = {
+        'Constitución': 'Constitucional',
+        'Ley': 'Legal',
+        'Decreto Ley': 'Legal',
+        'Decreto Supremo': 'Reglamentario',
+        'Resolución Ministerial': 'Administrativo',
+        'Resolución Administrativa': 'Administrativo',
+        'Ordenanza Municipal': 'Municipal',
+        'Reglamento': 'Reglamentario'
+    }
+
+    # Palabras comunes a ignorar en las palabras clave
+    STOPWORDS = frozenset({'el', 'la', 'de', 'que', 'y', 'a', 'en', 'un', 'ser', 'se', 'no',
+                           'lo', 'como', 'más', 'por', 'pero', 'su', 'al', 'le', 'ya', 'o'})
+
+    INDICADORES_NO_VIGENCIA = ('abroga', 'derog', 'sin efecto', 'sin vigencia')
+
     def __init__(self, schema_path: str = "config/metadata_schema.yaml"):
         """
         Inicializa el extractor de metadatos
@@ -37,7 +169,8 @@ class MetadataExtractor:
         return {}
 
     def extraer_metadatos(self, texto: str, archivo_path: Optional[str] = None,
-                         sitio_web: str = "", url_origen: str = "") -> Dict[str, Any]:
+                         sitio_web: str = "", url_origen: str = "",
+                         fecha_scraping: Optional[str] = None) -> Dict[str, Any]:
         """
         Extrae metadatos completos de un documento legal
 
@@ -46,12 +179,16 @@ class MetadataExtractor:
             archivo_path: Ruta al archivo original
             sitio_web: Nombre del sitio web fuente
             url_origen: URL de donde se obtuvo el documento
+            fecha_scraping: Fecha ISO del lote; si no se indica se usa la actual
 
         Returns:
             Diccionario con todos los metadatos extraídos
         """
+        # Versión en minúsculas compartida por los extractores que la necesitan
+        texto_minusculas = texto.lower()
+
         metadata = {
-            'fecha_scraping': datetime.now().isoformat(),
+            'fecha_scraping': fecha_scraping or datetime.now().isoformat(),
             'sitio_web': sitio_web,
             'url_origen': url_origen,
             'estado_procesamiento': 'procesando'
@@ -71,17 +208,17 @@ class MetadataExtractor:
         metadata.update(fechas)
 
         # Extraer órgano emisor y firmante
-        metadata['organo_emisor'] = self._extraer_organo_emisor(texto)
+        metadata['organo_emisor'] = self._extraer_organo_emisor(texto_minusculas)
         metadata['firmante'] = self._extraer_firmante(texto)
 
         # Determinar área del derecho
-        metadata['area_derecho'] = self._determinar_area_derecho(texto, sitio_web)
+        metadata['area_derecho'] = self._determinar_area_derecho(texto_minusculas, sitio_web)
 
         # Determinar jerarquía normativa
         metadata['jerarquia_normativa'] = self._determinar_jerarquia(metadata['tipo_norma'])
 
         # Extraer palabras clave
-        metadata['palabras_clave'] = self._extraer_palabras_clave(texto)
+        metadata['palabras_clave'] = self._extraer_palabras_clave(texto_minusculas)
 
         # Extraer artículos
         metadata['articulos_principales'] = self._extraer_articulos(texto)
@@ -92,7 +229,7 @@ class MetadataExtractor:
         metadata['total_caracteres'] = len(texto)
 
         # Determinar vigencia
-        metadata['vigente'] = self._determinar_vigencia(texto, fechas.get('fecha_abrogacion'))
+        metadata['vigente'] = self._determinar_vigencia(texto_minusculas, fechas.get('fecha_abrogacion'))
 
         # Extraer relaciones con otras leyes
         relaciones = self._extraer_relaciones(texto)
@@ -110,18 +247,9 @@ class MetadataExtractor:
 
     def _extraer_numero_ley(self, texto: str) -> str:
         """Extrae el número de ley del texto"""
-        patrones = [
-            r'Ley\s+N[°º]?\s*(\d+)',
-            r'LEY\s+N[°º]?\s*(\d+)',
-            r'D\.?S\.?\s+N[°º]?\s*(\d+)',
-            r'Decreto\s+Supremo\s+N[°º]?\s*(\d+)',
-            r'DECRETO\s+SUPREMO\s+N[°º]?\s*(\d+)',
-            r'Resolución\s+(?:Ministerial|Administrativa)\s+N[°º]?\s*(\d+)',
-            r'Sentencia\s+Constitucional\s+N[°º]?\s*(\d+/\d+)',
-        ]
-
-        for patron in patrones:
-            match = re.search(patron, texto[:2000], re.IGNORECASE)
+        texto_inicio = texto[:2000]
+        for patron in _PATRONES_NUMERO_LEY:
+            match = patron.search(texto_inicio)
             if match:
                 return match.group(0).strip()
 
@@ -131,20 +259,7 @@ class MetadataExtractor:
         """Determina el tipo de norma legal"""
         texto_inicio = texto[:1000].upper()
 
-        tipos = {
-            'Constitución': ['CONSTITUCIÓN', 'CONSTITUCIONAL POLÍTICA'],
-            'Ley': ['LEY N°', 'LEY N', 'LEY Nº'],
-            'Decreto Supremo': ['DECRETO SUPREMO', 'D.S.', 'DS N'],
-            'Decreto Ley': ['DECRETO LEY'],
-            'Resolución Ministerial': ['RESOLUCIÓN MINISTERIAL', 'R.M.'],
-            'Resolución Administrativa': ['RESOLUCIÓN ADMINISTRATIVA', 'R.A.'],
-            'Sentencia Constitucional': ['SENTENCIA CONSTITUCIONAL'],
-            'Ordenanza Municipal': ['ORDENANZA MUNICIPAL'],
-            'Reglamento': ['REGLAMENTO'],
-            'Código': ['CÓDIGO']
-        }
-
-        for tipo, patrones in tipos.items():
+        for tipo, patrones in self.TIPOS_NORMA.items():
             for patron in patrones:
                 if patron in texto_inicio:
                     return tipo
@@ -154,18 +269,13 @@ class MetadataExtractor:
     def _extraer_titulo(self, texto: str) -> str:
         """Extrae el título del documento"""
         # Buscar patrones comunes de títulos
-        patrones = [
-            r'Ley\s+N[°º]?\s*\d+\s*[:\-]?\s*(.+?)(?:\n|$)',
-            r'DECRETO\s+SUPREMO\s+N[°º]?\s*\d+\s*[:\-]?\s*(.+?)(?:\n|$)',
-            r'(?:LEY|DECRETO|RESOLUCIÓN).*?\n\s*(.+?)(?:\n\n|$)',
-        ]
-
-        for patron in patrones:
-            match = re.search(patron, texto[:1500], re.IGNORECASE | re.DOTALL)
+        texto_inicio = texto[:1500]
+        for patron in _PATRONES_TITULO:
+            match = patron.search(texto_inicio)
             if match:
                 titulo = match.group(1).strip()
                 # Limpiar el título
-                titulo = re.sub(r'\s+', ' ', titulo)
+                titulo = _PATRON_ESPACIOS.sub(' ', titulo)
                 if len(titulo) > 10 and len(titulo) < 300:
                     return titulo
 
@@ -185,16 +295,13 @@ class MetadataExtractor:
             'fecha_abrogacion': None
         }
 
-        # Patrones de fecha en español
-        patron_fecha = r'(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})'
-        matches = re.finditer(patron_fecha, texto[:3000], re.IGNORECASE)
+        meses = self.meses_es
 
-        fechas_encontradas = []
-        for match in matches:
-            dia, mes, anio = match.groups()
-            mes_num = self.meses_es.get(mes.lower(), '01')
-            fecha_str = f"{anio}-{mes_num}-{dia.zfill(2)}"
-            fechas_encontradas.append(fecha_str)
+        # findall devuelve las tuplas de grupos sin crear objetos Match
+        fechas_encontradas = [
+            f"{anio}-{meses.get(mes.lower(), '01')}-{dia.zfill(2)}"
+            for dia, mes, anio in _PATRON_FECHA.findall(texto[:3000])
+        ]
 
         # Asignar fechas encontradas
         if len(fechas_encontradas) > 0:
@@ -202,29 +309,18 @@ class MetadataExtractor:
         if len(fechas_encontradas) > 1:
             fechas['fecha_publicacion'] = fechas_encontradas[1]
 
-        # Buscar fecha de abrogación
-        if re.search(r'abroga|derog|sin efecto', texto, re.IGNORECASE):
-            if len(fechas_encontradas) > 2:
-                fechas['fecha_abrogacion'] = fechas_encontradas[-1]
+        # Buscar fecha de abrogación; el texto completo solo se recorre si
+        # hay una tercera fecha en la cabecera que pueda asignarse
+        if len(fechas_encontradas) > 2 and _PATRON_ABROGACION.search(texto):
+            fechas['fecha_abrogacion'] = fechas_encontradas[-1]
 
         return fechas
 
-    def _extraer_organo_emisor(self, texto: str) -> str:
-        """Extrae el órgano que emitió la norma"""
-        organos = [
-            'Asamblea Legislativa Plurinacional',
-            'Congreso Nacional',
-            'Poder Ejecutivo',
-            'Tribunal Constitucional Plurinacional',
-            'Órgano Judicial',
-            'Ministerio',
-            'Gobierno Municipal',
-            'Gobierno Departamental'
-        ]
-
-        texto_inicio = texto[:2000]
-        for organo in organos:
-            if organo.lower() in texto_inicio.lower():
+    def _extraer_organo_emisor(self, texto_minusculas: str) -> str:
+        """Extrae el órgano que emitió la norma a partir del texto en minúsculas"""
+        texto_inicio = texto_minusculas[:2000]
+        for organo_minusculas, organo in self._ORGANOS_EMISORES_MINUSCULAS:
+            if organo_minusculas in texto_inicio:
                 return organo
 
         return "Órgano no identificado"
@@ -232,56 +328,26 @@ class MetadataExtractor:
     def _extraer_firmante(self, texto: str) -> Optional[str]:
         """Extrae el nombre del firmante de la norma"""
         # Buscar patrones de firma
-        patrones = [
-            r'(?:Fdo\.|Firmado|Refrendado)\s*[:.]?\s*([A-ZÁÉÍÓÚ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚ][a-záéíóúñ]+)+)',
-            r'Presidente(?:\s+Constitucional)?\s*[:.]?\s*([A-ZÁÉÍÓÚ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚ][a-záéíóúñ]+)+)',
-        ]
-
-        for patron in patrones:
-            match = re.search(patron, texto[-2000:])
+        texto_final = texto[-2000:]
+        for patron in _PATRONES_FIRMANTE:
+            match = patron.search(texto_final)
             if match:
                 return match.group(1).strip()
 
         return None
 
-    def _determinar_area_derecho(self, texto: str, sitio_web: str) -> str:
-        """Determina el área del derecho basándose en el contenido y sitio web"""
+    def _determinar_area_derecho(self, texto_minusculas: str, sitio_web: str) -> str:
+        """Determina el área del derecho según el texto en minúsculas y el sitio web"""
         # Primero, intentar determinar por sitio web
-        areas_sitio = {
-            'Tribunal Constitucional': 'Constitucional',
-            'Ministerio de Trabajo': 'Laboral',
-            'Ministerio de Salud': 'Salud',
-            'Ministerio de Educación': 'Educación',
-            'Ministerio de Medio Ambiente': 'Ambiental',
-            'Ministerio de Minería': 'Minero',
-            'Ministerio de Hidrocarburos': 'Hidrocarburos',
-            'INRA': 'Agrario',
-            'Impuestos': 'Tributario',
-            'Aduana': 'Aduanero',
-            'Fiscalía': 'Penal',
-            'Contraloría': 'Administrativo'
-        }
-
-        for clave, area in areas_sitio.items():
-            if clave.lower() in sitio_web.lower():
+        sitio_minusculas = sitio_web.lower()
+        for clave_minusculas, area in self._AREAS_POR_SITIO_MINUSCULAS:
+            if clave_minusculas in sitio_minusculas:
                 return area
 
         # Determinar por palabras clave en el texto
-        texto_analisis = texto[:5000].lower()
-
-        areas_palabras = {
-            'Constitucional': ['constitución', 'constitucional', 'derechos fundamentales'],
-            'Penal': ['penal', 'delito', 'pena', 'prisión', 'sanción penal'],
-            'Laboral': ['laboral', 'trabajo', 'trabajador', 'empleador', 'salario', 'contrato de trabajo'],
-            'Tributario': ['tributario', 'impuesto', 'tributo', 'fiscal'],
-            'Ambiental': ['ambiental', 'medio ambiente', 'ecológico', 'recursos naturales'],
-            'Minero': ['minero', 'minería', 'explotación minera', 'yacimiento'],
-            'Administrativo': ['administrativo', 'administración pública', 'servidor público'],
-            'Civil': ['civil', 'contrato', 'obligación', 'responsabilidad civil'],
-            'Comercial': ['comercial', 'comercio', 'mercantil', 'empresa'],
-        }
+        texto_analisis = texto_minusculas[:5000]
 
-        for area, palabras in areas_palabras.items():
+        for area, palabras in self.AREAS_POR_PALABRAS.items():
             for palabra in palabras:
                 if palabra in texto_analisis:
                     return area
@@ -290,68 +356,41 @@ class MetadataExtractor:
 
     def _determinar_jerarquia(self, tipo_norma: str) -> str:
         """Determina la jerarquía normativa según el tipo"""
-        jerarquias = {
-            'Constitución': 'Constitucional',
-            'Ley': 'Legal',
-            'Decreto Ley': 'Legal',
-            'Decreto Supremo': 'Reglamentario',
-            'Resolución Ministerial': 'Administrativo',
-            'Resolución Administrativa': 'Administrativo',
-            'Ordenanza Municipal': 'Municipal',
-            'Reglamento': 'Reglamentario'
-        }
-
-        return jerarquias.get(tipo_norma, 'Legal')
-
-    def _extraer_palabras_clave(self, texto: str, max_palabras: int = 20) -> List[str]:
-        """Extrae palabras clave relevantes del documento"""
-        # Palabras comunes a ignorar
-        stopwords = {'el', 'la', 'de', 'que', 'y', 'a', 'en', 'un', 'ser', 'se', 'no',
-                    'lo', 'como', 'más', 'por', 'pero', 'su', 'al', 'le', 'ya', 'o'}
+        return self.JERARQUIAS.get(tipo_norma, 'Legal')
 
+    def _extraer_palabras_clave(self, texto_minusculas: str, max_palabras: int = 20) -> List[str]:
+        """Extrae palabras clave relevantes del texto en minúsculas"""
         # Extraer palabras
-        palabras = re.findall(r'\b[a-záéíóúñ]{4,}\b', texto.lower())
+        palabras = _PATRON_PALABRA.findall(texto_minusculas)
 
-        # Contar frecuencias
-        from collections import Counter
-        conteo = Counter(p for p in palabras if p not in stopwords)
+        # Contar frecuencias: Counter cuenta la lista en C; es más barato
+        # descartar luego las pocas stopwords que filtrar palabra a palabra
+        conteo = Counter(palabras)
+        for stopword in self.STOPWORDS:
+            conteo.pop(stopword, None)
 
         # Retornar las más frecuentes
         return [palabra for palabra, _ in conteo.most_common(max_palabras)]
 
     def _extraer_articulos(self, texto: str, max_articulos: int = 50) -> List[Dict]:
         """Extrae los artículos del documento"""
-        articulos = []
-
-        # Patrón para artículos
-        patron = r'Art[íi]culo\s+(\d+)[°º]?\s*[:\-.]?\s*(.*?)(?=Art[íi]culo\s+\d+|$)'
-
-        matches = re.finditer(patron, texto, re.IGNORECASE | re.DOTALL)
-
-        for i, match in enumerate(matches):
-            if i >= max_articulos:
-                break
-
-            numero, contenido = match.groups()
-            articulo = {
-                'numero': int(numero),
-                'contenido': contenido.strip()[:500]  # Limitar a 500 caracteres
+        # islice corta el finditer perezoso al llegar al máximo
+        return [
+            {
+                'numero': int(match.group(1)),
+                'contenido': match.group(2).strip()[:500]  # Limitar a 500 caracteres
             }
-            articulos.append(articulo)
-
-        return articulos
+            for match in islice(_PATRON_ARTICULO.finditer(texto), max_articulos)
+        ]
 
-    def _determinar_vigencia(self, texto: str, fecha_abrogacion: Optional[str]) -> bool:
-        """Determina si la norma está vigente"""
+    def _determinar_vigencia(self, texto_minusculas: str, fecha_abrogacion: Optional[str]) -> bool:
+        """Determina si la norma está vigente a partir del texto en minúsculas"""
         if fecha_abrogacion:
             return False
 
         # Buscar indicadores de no vigencia
-        indicadores = ['abroga', 'derog', 'sin efecto', 'sin vigencia']
-        texto_busqueda = texto.lower()
-
-        for indicador in indicadores:
-            if indicador in texto_busqueda:
+        for indicador in self.INDICADORES_NO_VIGENCIA:
+            if indicador in texto_minusculas:
                 return False
 
         return True
@@ -368,18 +407,15 @@ class MetadataExtractor:
         }
 
         # Buscar leyes que modifica
-        patron_modifica = r'modifica(?:ndo)?\s+(?:la\s+)?Ley\s+N?[°º]?\s*(\d+)'
-        matches = re.finditer(patron_modifica, texto, re.IGNORECASE)
+        matches = _PATRON_MODIFICA.finditer(texto)
         relaciones['modifica_a'] = [f"Ley {m.group(1)}" for m in matches]
 
         # Buscar leyes que deroga
-        patron_deroga = r'deroga(?:ndo)?\s+(?:la\s+)?Ley\s+N?[°º]?\s*(\d+)'
-        matches = re.finditer(patron_deroga, texto, re.IGNORECASE)
+        matches = _PATRON_DEROGA.finditer(texto)
         relaciones['deroga_a'] = [f"Ley {m.group(1)}" for m in matches]
 
         # Buscar si reglamenta una ley
-        patron_reglamenta = r'reglamenta(?:ndo)?\s+(?:la\s+)?Ley\s+N?[°º]?\s*(\d+)'
-        match = re.search(patron_reglamenta, texto, re.IGNORECASE)
+        match = _PATRON_REGLAMENTA.search(texto)
         if match:
             relaciones['reglamenta_a'] = f"Ley {match.group(1)}"
 
@@ -397,20 +433,23 @@ class MetadataExtractor:
         """Extrae metadatos del archivo físico"""
         path = Path(archivo_path)
 
-        if not path.exists():
+        # Un solo stat: comprueba la existencia y da el tamaño
+        try:
+            tamanio_bytes = path.stat().st_size
+        except FileNotFoundError:
             return {}
 
         metadata = {
             'ruta_archivo_original': str(path),
             'formato_original': path.suffix.upper().replace('.', ''),
-            'tamanio_bytes': path.stat().st_size
+            'tamanio_bytes': tamanio_bytes
         }
 
-        # Calcular hashes
-        with open(path, 'rb') as f:
-            contenido = f.read()
-            metadata['hash_md5'] = hashlib.md5(contenido).hexdigest()
-            metadata['hash_sha256'] = hashlib.sha256(contenido).hexdigest()
+        # Calcular ambos hashes en una sola lectura por bloques, sin cargar
+        # el archivo completo en memoria
+        hashes = calcular_hashes_archivo(path)
+        metadata['hash_md5'] = hashes['md5']
+        metadata['hash_sha256'] = hashes['sha256']
 
         return metadata
 
@@ -423,29 +462,25 @@ class MetadataExtractor:
             metadata: Diccionario con metadatos a agregar
         """
         try:
-            from PyPDF2 import PdfReader, PdfWriter
-
-            reader = PdfReader(pdf_path)
-            writer = PdfWriter()
+            import fitz  # PyMuPDF
 
-            # Copiar todas las páginas
-            for page in reader.pages:
-                writer.add_page(page)
+            # PyMuPDF reescribe el archivo en C, sin copiar página por página
+            doc = fitz.open(pdf_path)
 
             # Agregar metadatos
-            writer.add_metadata({
-                '/Title': metadata.get('titulo', ''),
-                '/Author': metadata.get('firmante', metadata.get('organo_emisor', '')),
-                '/Subject': f"{metadata.get('tipo_norma', '')} - {metadata.get('area_derecho', '')}",
-                '/Keywords': ', '.join(metadata.get('palabras_clave', [])[:10]),
-                '/Producer': 'BÚHO Scraper - Bolivia',
-                '/Creator': 'bo-gov-scraper-buho'
+            doc.set_metadata({
+                'title': metadata.get('titulo', ''),
+                'author': metadata.get('firmante', metadata.get('organo_emisor', '')),
+                'subject': f"{metadata.get('tipo_norma', '')} - {metadata.get('area_derecho', '')}",
+                'keywords': ', '.join(metadata.get('palabras_clave', [])[:10]),
+                'producer': 'BÚHO Scraper - Bolivia',
+                'creator': 'bo-gov-scraper-buho'
             })
 
             # Guardar PDF con metadatos
             output_path = pdf_path.replace('.pdf', '_con_metadatos.pdf')
-            with open(output_path, 'wb') as output_file:
-                writer.write(output_file)
+            doc.save(output_path)
+            doc.close()
 
             print(f"Metadatos agregados a: {output_path}")
             return output_path
@@ -4,15 +4,87 @@ Scrapea múltiples sitios gubernamentales simultáneamente con procesamiento com
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from bs4 import BeautifulSoup, SoupStrainer
 import yaml
+import json
 import time
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Union
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from tqdm import tqdm
 import hashlib
+import random
+import shutil
+import re
+
+# Enlaces a documentos descargables (.pdf, .doc, .docx)
+_PATRON_HREF_DOCUMENTO = re.compile(r'\.(?:pdf|docx?)', re.IGNORECASE)
+
+# Sin selectores personalizados solo interesan esos enlaces: el resto del
+# documento no se convierte en árbol
+_FILTRO_ENLACES_DOCUMENTO = SoupStrainer('a', href=_PATRON_HREF_DOCUMENTO)
+
+_PATRONES_NUMERO_LEY = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'Ley\s+N?[°º]?\s*(\d+)',
+    r'D\.?S\.?\s+N?[°º]?\s*(\d+)',
+    r'Resolución\s+N?[°º]?\s*(\d+)',
+))
+_PATRON_CARACTERES_INVALIDOS = re.compile(r'[^\w\s-]')
+_PATRON_ESPACIOS = re.compile(r'\s+')
+
+# Errores pasajeros (red, tiempo de espera, cuerpo cortado): vale la pena
+# reintentar. Los de urllib3 llegan al leer respuesta.raw en las descargas
+_ERRORES_TRANSITORIOS = (
+    requests.ConnectionError, requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    ProtocolError, ReadTimeoutError,
+)
+
+
+def _es_error_transitorio(error: Exception) -> bool:
+    """Indica si un error HTTP es pasajero (red, 429 o 5xx) y se puede reintentar"""
+    if isinstance(error, _ERRORES_TRANSITORIOS):
+        return True
+    respuesta = getattr(error, 'response', None)
+    return respuesta is not None and (respuesta.status_code == 429
+                                      or respuesta.status_code >= 500)
+
+
+def _espera_reintento(intento: int) -> float:
+    """Segundos de espera antes del reintento: backoff exponencial con jitter"""
+    # El jitter evita que los hilos que fallaron a la vez reintenten a la vez
+    return 2 ** intento + random.uniform(0, 1)
+
+
+@lru_cache(maxsize=4096)
+def _url_absoluta(url: str, url_base: str) -> str:
+    """Convierte un href (absoluto o relativo) en URL absoluta"""
+    if url.startswith('http'):
+        return url
+    if url.startswith('/'):
+        return f"{url_base}{url}"
+    return f"{url_base}/{url}"
+
+
+@lru_cache(maxsize=4096)
+def _tipo_archivo(url: str) -> str:
+    """Detecta el tipo de archivo desde la URL (cacheado por URL)"""
+    url_lower = url.lower()
+
+    if '.pdf' in url_lower:
+        return 'pdf'
+    elif '.docx' in url_lower:
+        return 'docx'
+    elif '.doc' in url_lower:
+        return 'doc'
+    elif any(ext in url_lower for ext in ['.png', '.jpg', '.jpeg']):
+        return 'jpg'
+    else:
+        return 'pdf'  # Asumir PDF por defecto
 
 
 class MultiSiteScraper:
@@ -35,6 +107,12 @@ class MultiSiteScraper:
         self.session = requests.Session()
         self._configurar_session()
 
+        # Validadores HTTP (ETag / Last-Modified) de las páginas de listado,
+        # usados para peticiones condicionales en modo solo_cambios
+        self.validadores_path = self.output_dir / '.validadores_http.json'
+        self.validadores = self._cargar_validadores()
+        self._validadores_recibidos: Dict[str, Dict] = {}
+
         self.estadisticas = {
             'sitios_scrapeados': 0,
             'documentos_descargados': 0,
@@ -63,16 +141,45 @@ class MultiSiteScraper:
             'Connection': 'keep-alive',
         })
 
+        # Un pool keep-alive por sitio: requests guarda solo 10 por defecto y
+        # con más sitios configurados los pools se descartan y se reabre TLS
+        adaptador = HTTPAdapter(
+            pool_connections=max(10, len(self.config.get('sites', [])))
+        )
+        self.session.mount('https://', adaptador)
+        self.session.mount('http://', adaptador)
+
         self.timeout = settings.get('timeout', 30)
         self.retry_attempts = settings.get('retry_attempts', 3)
         self.delay = settings.get('delay_between_requests', 2)
 
-    def scrapear_todos_los_sitios(self, max_workers: int = 5) -> Dict:
+    def _cargar_validadores(self) -> Dict[str, Dict]:
+        """Carga los validadores HTTP guardados en la ejecución anterior"""
+        if self.validadores_path.exists():
+            try:
+                with open(self.validadores_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  No se pudieron leer los validadores HTTP: {e}")
+        return {}
+
+    def _guardar_validadores(self):
+        """Persiste los validadores HTTP para la próxima ejecución"""
+        try:
+            with open(self.validadores_path, 'w', encoding='utf-8') as f:
+                json.dump(self.validadores, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"⚠️  No se pudieron guardar los validadores HTTP: {e}")
+
+    def scrapear_todos_los_sitios(self, max_workers: int = 5,
+                                  solo_cambios: bool = False) -> Dict:
         """
         Scrapea todos los sitios configurados de manera concurrente
 
         Args:
             max_workers: Número de hilos concurrentes
+            solo_cambios: Si True, omite los sitios cuyo listado no cambió
+                desde la última ejecución (respuesta HTTP 304)
 
         Returns:
             Diccionario con resultados del scraping
@@ -90,7 +197,7 @@ class MultiSiteScraper:
 
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             futuros = {
-                executor.submit(self.scrapear_sitio, sitio): sitio
+                executor.submit(self.scrapear_sitio, sitio, solo_cambios): sitio
                 for sitio in sitios_habilitados
             }
 
@@ -112,14 +219,18 @@ class MultiSiteScraper:
                         'error': str(e)
                     })
 
+        self._guardar_validadores()
+
         return resultados
 
-    def scrapear_sitio(self, sitio_config: Dict) -> Dict:
+    def scrapear_sitio(self, sitio_config: Dict, solo_cambios: bool = False) -> Dict:
         """
         Scrapea un sitio individual
 
         Args:
             sitio_config: Configuración del sitio
+            solo_cambios: Si True, hace una petición condicional del listado
+                y no procesa nada si el servidor responde 304
 
         Returns:
             Diccionario con resultados del scraping
@@ -135,7 +246,9 @@ class MultiSiteScraper:
             'exito': False,
             'documentos_encontrados': 0,
             'documentos_descargados': 0,
+            'documentos_existentes': 0,
             'enlaces_documentos': [],
+            'sin_cambios': False,
             'errores': []
         }
 
@@ -152,13 +265,23 @@ class MultiSiteScraper:
             url_listado = f"{url_base}{list_page}" if list_page else url_base
 
             # Obtener la página
-            html = self._obtener_pagina(url_listado)
-            if not html:
+            html = self._obtener_pagina(url_listado, condicional=solo_cambios)
+            if html is None:
                 resultado['errores'].append("No se pudo obtener la página principal")
                 return resultado
 
-            # Parsear HTML
-            soup = BeautifulSoup(html, 'lxml')
+            if not html:
+                # 304 Not Modified: el listado es el mismo de la última ejecución
+                print(f"   ♻️  Sin cambios desde el último scraping")
+                resultado['sin_cambios'] = True
+                resultado['exito'] = True
+                return resultado
+
+            # Parsear HTML (completo solo si hay selectores CSS configurados)
+            if scraping_cfg.get('selectors'):
+                soup = BeautifulSoup(html, 'lxml')
+            else:
+                soup = BeautifulSoup(html, 'lxml', parse_only=_FILTRO_ENLACES_DOCUMENTO)
 
             # Buscar enlaces a documentos legales
             enlaces = self._extraer_enlaces_documentos(soup, scraping_cfg, url_base)
@@ -168,25 +291,48 @@ class MultiSiteScraper:
 
             print(f"   📄 {len(enlaces)} documentos encontrados")
 
+            # Archivos ya descargados en ejecuciones anteriores; el nombre
+            # depende de la URL y del número de ley del enlace, así que basta
+            # con comprobar pertenencia (si cambia el texto del enlace, el
+            # documento se vuelve a descargar con otro nombre)
+            existentes = {ruta.name for ruta in sitio_dir.iterdir()}
+
             # Descargar documentos
             for enlace in tqdm(enlaces[:50], desc=f"   Descargando de {nombre_sitio}"):
                 try:
-                    archivo_descargado = self._descargar_documento(
+                    archivo_descargado, omitido = self._descargar_documento(
                         enlace['url'],
                         sitio_dir,
-                        prefijo=enlace.get('numero_ley', 'doc')
+                        prefijo=enlace.get('numero_ley') or 'doc',
+                        existentes=existentes
                     )
 
                     if archivo_descargado:
                         enlace['archivo_local'] = archivo_descargado
-                        resultado['documentos_descargados'] += 1
+                        if omitido:
+                            resultado['documentos_existentes'] += 1
+                        else:
+                            resultado['documentos_descargados'] += 1
 
-                    time.sleep(self.delay)  # Delay entre descargas
+                    # Delay entre descargas; si el archivo ya estaba en disco
+                    # no hubo petición al servidor y no hace falta esperar
+                    if not omitido:
+                        time.sleep(self.delay)
 
                 except Exception as e:
                     resultado['errores'].append(f"Error descargando {enlace['url']}: {e}")
 
-            resultado['exito'] = resultado['documentos_descargados'] > 0
+            if resultado['documentos_existentes']:
+                print(f"   ⏭️  {resultado['documentos_existentes']} documentos ya descargados, se omiten")
+
+            resultado['exito'] = (resultado['documentos_descargados']
+                                  + resultado['documentos_existentes']) > 0
+
+            # Solo se recuerdan los validadores si el listado se procesó bien,
+            # para no saltarse en la próxima ejecución un sitio que falló
+            validadores = self._validadores_recibidos.pop(url_listado, None)
+            if resultado['exito'] and validadores:
+                self.validadores[url_listado] = validadores
 
         except Exception as e:
             resultado['errores'].append(f"Error general: {str(e)}")
@@ -194,18 +340,58 @@ class MultiSiteScraper:
 
         return resultado
 
-    def _obtener_pagina(self, url: str) -> Optional[str]:
-        """Obtiene el HTML de una página con reintentos"""
+    def _obtener_pagina(self, url: str, condicional: bool = False) -> Optional[Union[str, bytes]]:
+        """
+        Obtiene el HTML de una página con reintentos
+
+        Args:
+            url: URL de la página
+            condicional: Si True, envía If-None-Match / If-Modified-Since con
+                los validadores guardados
+
+        Returns:
+            HTML de la página (en bytes si el servidor no indicó el charset),
+            cadena vacía si el servidor respondió 304 o None si no se pudo
+            obtener
+        """
+        cabeceras = {}
+        if condicional:
+            validadores = self.validadores.get(url, {})
+            if validadores.get('etag'):
+                cabeceras['If-None-Match'] = validadores['etag']
+            if validadores.get('last_modified'):
+                cabeceras['If-Modified-Since'] = validadores['last_modified']
+
         for intento in range(self.retry_attempts):
             try:
-                respuesta = self.session.get(url, timeout=self.timeout)
+                respuesta = self.session.get(url, timeout=self.timeout, headers=cabeceras)
+                if respuesta.status_code == 304:
+                    return ''
                 respuesta.raise_for_status()
-                return respuesta.text
+
+                etag = respuesta.headers.get('ETag')
+                last_modified = respuesta.headers.get('Last-Modified')
+                if etag or last_modified:
+                    self._validadores_recibidos[url] = {
+                        'etag': etag,
+                        'last_modified': last_modified
+                    }
+
+                # Sin charset en Content-Type, requests supone ISO-8859-1 para
+                # text/* (y adivina recorriendo el cuerpo para el resto); se
+                # devuelven los bytes y BeautifulSoup usa el <meta> charset
+                tipo_contenido = respuesta.headers.get('Content-Type', '')
+                if 'charset=' not in tipo_contenido.lower():
+                    return respuesta.content or None
+
+                return respuesta.text or None
 
             except requests.RequestException as e:
                 print(f"   ⚠️  Intento {intento + 1}/{self.retry_attempts} falló: {e}")
-                if intento < self.retry_attempts - 1:
-                    time.sleep(2 ** intento)  # Backoff exponencial
+                # Un 404 o 403 no cambia al reintentar: solo se reintentan
+                # los errores pasajeros
+                if _es_error_transitorio(e) and intento < self.retry_attempts - 1:
+                    time.sleep(_espera_reintento(intento))
                 else:
                     print(f"   ❌ No se pudo obtener: {url}")
                     return None
@@ -229,34 +415,18 @@ class MultiSiteScraper:
 
         try:
             # Buscar enlaces a PDFs directamente
-            enlaces_pdf = soup.find_all('a', href=lambda href: href and
-                                       ('.pdf' in href.lower() or
-                                        '.doc' in href.lower() or
-                                        '.docx' in href.lower()))
+            enlaces_pdf = soup.find_all('a', href=_PATRON_HREF_DOCUMENTO)
 
             for enlace in enlaces_pdf:
-                url = enlace.get('href', '')
-
-                # Convertir a URL absoluta
-                if url.startswith('http'):
-                    url_completa = url
-                elif url.startswith('/'):
-                    url_completa = f"{url_base}{url}"
-                else:
-                    url_completa = f"{url_base}/{url}"
-
                 # Intentar extraer información del enlace
                 texto_enlace = enlace.get_text(strip=True)
-                numero_ley = self._extraer_numero_ley_de_texto(texto_enlace)
-
-                documento = {
-                    'url': url_completa,
-                    'titulo': texto_enlace[:200] if texto_enlace else 'Sin título',
-                    'numero_ley': numero_ley,
-                    'tipo': self._detectar_tipo_archivo(url_completa)
-                }
 
-                documentos.append(documento)
+                documentos.append(self._crear_documento(
+                    enlace.get('href', ''),
+                    url_base,
+                    titulo=texto_enlace[:200] if texto_enlace else 'Sin título',
+                    numero_ley=self._extraer_numero_ley_de_texto(texto_enlace)
+                ))
 
             # Si hay selectores específicos configurados, usarlos
             if config.get('selectors'):
@@ -293,30 +463,43 @@ class MultiSiteScraper:
                     if not url:
                         continue
 
-                    # Convertir a URL absoluta
-                    if url.startswith('http'):
-                        url_completa = url
-                    elif url.startswith('/'):
-                        url_completa = f"{url_base}{url}"
-                    else:
-                        url_completa = f"{url_base}/{url}"
-
-                    documento = {
-                        'url': url_completa,
-                        'titulo': elemento.get_text(strip=True),
-                        'numero_ley': None,
-                        'tipo': self._detectar_tipo_archivo(url_completa)
-                    }
-
-                    documentos.append(documento)
+                    documentos.append(self._crear_documento(
+                        url,
+                        url_base,
+                        titulo=elemento.get_text(strip=True)
+                    ))
 
         except Exception as e:
             print(f"   ⚠️  Error con selectores: {e}")
 
         return documentos
 
+    def _crear_documento(self, href: str, url_base: str, titulo: str,
+                         numero_ley: Optional[str] = None) -> Dict:
+        """
+        Construye el diccionario de un documento encontrado en un listado
+
+        Args:
+            href: Enlace tal como aparece en la página
+            url_base: URL base del sitio
+            titulo: Título del documento
+            numero_ley: Número de ley si pudo identificarse
+
+        Returns:
+            Diccionario con url, titulo, numero_ley y tipo
+        """
+        url_completa = _url_absoluta(href, url_base)
+
+        return {
+            'url': url_completa,
+            'titulo': titulo,
+            'numero_ley': numero_ley,
+            'tipo': self._detectar_tipo_archivo(url_completa)
+        }
+
     def _descargar_documento(self, url: str, directorio: Path,
-                            prefijo: str = "documento") -> Optional[str]:
+                            prefijo: str = "documento",
+                            existentes: Optional[set] = None) -> Tuple[Optional[str], bool]:
         """
         Descarga un documento y lo guarda localmente
 
@@ -324,47 +507,59 @@ class MultiSiteScraper:
             url: URL del documento
             directorio: Directorio de destino
             prefijo: Prefijo para el nombre del archivo
+            existentes: Nombres de archivo ya presentes en el directorio;
+                si el documento está entre ellos no se vuelve a descargar
 
         Returns:
-            Ruta al archivo descargado o None si falló
+            Tupla (ruta al archivo o None si falló, True si ya existía y no
+            se hizo ninguna petición)
         """
-        try:
-            respuesta = self.session.get(url, timeout=self.timeout, stream=True)
-            respuesta.raise_for_status()
-
-            # Determinar extensión
-            extension = self._detectar_tipo_archivo(url)
-
-            # Generar nombre de archivo único
-            hash_url = hashlib.md5(url.encode()).hexdigest()[:8]
-            prefijo_limpio = self._limpiar_nombre(prefijo)
-            nombre_archivo = f"{prefijo_limpio}_{hash_url}.{extension}"
+        # Determinar extensión
+        extension = self._detectar_tipo_archivo(url)
 
-            ruta_archivo = directorio / nombre_archivo
+        # Generar nombre de archivo único
+        hash_url = hashlib.md5(url.encode()).hexdigest()[:8]
+        prefijo_limpio = self._limpiar_nombre(prefijo)
+        nombre_archivo = f"{prefijo_limpio}_{hash_url}.{extension}"
 
-            # Guardar archivo
-            with open(ruta_archivo, 'wb') as f:
-                for chunk in respuesta.iter_content(chunk_size=8192):
-                    f.write(chunk)
+        ruta_archivo = directorio / nombre_archivo
+        ruta_temporal = ruta_archivo.with_name(nombre_archivo + '.part')
 
-            return str(ruta_archivo)
+        if existentes is not None and nombre_archivo in existentes:
+            return str(ruta_archivo), True
 
-        except Exception as e:
-            print(f"   ⚠️  Error descargando {url}: {e}")
-            return None
+        for intento in range(self.retry_attempts):
+            try:
+                with self.session.get(url, timeout=self.timeout, stream=True) as respuesta:
+                    respuesta.raise_for_status()
+
+                    # Guardar archivo (la copia se hace en C con buffer de 1 MB).
+                    # Se escribe a un temporal para que una descarga cortada no
+                    # quede como archivo existente en la próxima ejecución
+                    respuesta.raw.decode_content = True
+                    with open(ruta_temporal, 'wb') as f:
+                        shutil.copyfileobj(respuesta.raw, f, length=1 << 20)
+                    ruta_temporal.replace(ruta_archivo)
+
+                if existentes is not None:
+                    existentes.add(nombre_archivo)
+                return str(ruta_archivo), False
+
+            except Exception as e:
+                if _es_error_transitorio(e) and intento < self.retry_attempts - 1:
+                    print(f"   ⚠️  Intento {intento + 1}/{self.retry_attempts} descargando {url} falló: {e}")
+                    time.sleep(_espera_reintento(intento))
+                    continue
+                print(f"   ⚠️  Error descargando {url}: {e}")
+                ruta_temporal.unlink(missing_ok=True)
+                return None, False
+
+        return None, False
 
     def _extraer_numero_ley_de_texto(self, texto: str) -> Optional[str]:
         """Extrae el número de ley de un texto"""
-        import re
-
-        patrones = [
-            r'Ley\s+N?[°º]?\s*(\d+)',
-            r'D\.?S\.?\s+N?[°º]?\s*(\d+)',
-            r'Resolución\s+N?[°º]?\s*(\d+)',
-        ]
-
-        for patron in patrones:
-            match = re.search(patron, texto, re.IGNORECASE)
+        for patron in _PATRONES_NUMERO_LEY:
+            match = patron.search(texto)
             if match:
                 return match.group(0)
 
@@ -372,26 +567,14 @@ class MultiSiteScraper:
 
     def _detectar_tipo_archivo(self, url: str) -> str:
         """Detecta el tipo de archivo desde la URL"""
-        url_lower = url.lower()
-
-        if '.pdf' in url_lower:
-            return 'pdf'
-        elif '.docx' in url_lower:
-            return 'docx'
-        elif '.doc' in url_lower:
-            return 'doc'
-        elif any(ext in url_lower for ext in ['.png', '.jpg', '.jpeg']):
-            return 'jpg'
-        else:
-            return 'pdf'  # Asumir PDF por defecto
+        return _tipo_archivo(url)
 
     def _limpiar_nombre(self, texto: str) -> str:
         """Limpia un texto para usarlo como nombre de archivo/directorio"""
-        import re
         # Eliminar caracteres especiales
-        texto = re.sub(r'[^\w\s-]', '', texto)
+        texto = _PATRON_CARACTERES_INVALIDOS.sub('', texto)
         # Reemplazar espacios con guiones bajos
-        texto = re.sub(r'\s+', '_', texto)
+        texto = _PATRON_ESPACIOS.sub('_', texto)
         return texto[:50].lower()
 
     def obtener_estadisticas(self) -> Dict:
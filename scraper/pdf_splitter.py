@@ -9,6 +9,17 @@ from typing import List, Dict, Optional
 import re
 
 
+# Encabezados de capítulo/título/sección/libro al inicio de una línea,
+# combinados en un solo patrón compilado
+_PATRON_TITULO_SECCION = re.compile(
+    r'^(?:CAPÍTULO|TÍTULO|SECCIÓN|LIBRO)\s+[IVXLCDM]+|^(?:Capítulo|Título)\s+\d+',
+    re.IGNORECASE
+)
+_PATRON_ARTICULO = re.compile(r'Art[íi]culo\s+(\d+)[°º]?', re.IGNORECASE)
+_PATRON_CARACTERES_INVALIDOS = re.compile(r'[^\w\s-]')
+_PATRON_ESPACIOS = re.compile(r'\s+')
+
+
 class PDFSplitter:
     """Divisor inteligente de PDFs con detección de estructura"""
 
@@ -40,7 +51,7 @@ class PDFSplitter:
 
         try:
             doc = fitz.open(pdf_path)
-            total_paginas = len(doc)
+            total_paginas = doc.page_count
 
             print(f"Procesando PDF: {path.name} ({total_paginas} páginas)")
 
@@ -111,30 +122,20 @@ class PDFSplitter:
         """Detecta títulos analizando el texto y formato"""
         estructura = []
 
-        patrones_titulos = [
-            r'^CAPÍTULO\s+[IVXLCDM]+',
-            r'^TÍTULO\s+[IVXLCDM]+',
-            r'^SECCIÓN\s+[IVXLCDM]+',
-            r'^LIBRO\s+[IVXLCDM]+',
-            r'^Capítulo\s+\d+',
-            r'^Título\s+\d+',
-        ]
-
-        for pagina_num in range(min(len(doc), 100)):  # Analizar primeras 100 páginas
+        for pagina_num in range(min(doc.page_count, 100)):  # Analizar primeras 100 páginas
             pagina = doc[pagina_num]
             texto = pagina.get_text()
 
-            for linea in texto.split('\n')[:20]:  # Primeras 20 líneas de cada página
+            # maxsplit evita partir la página entera para usar solo 20 líneas
+            for linea in texto.split('\n', 20)[:20]:  # Primeras 20 líneas de cada página
                 linea = linea.strip()
 
-                for patron in patrones_titulos:
-                    if re.match(patron, linea, re.IGNORECASE):
-                        estructura.append({
-                            'nivel': 1,
-                            'titulo': linea[:100],
-                            'pagina_inicio': pagina_num
-                        })
-                        break
+                if _PATRON_TITULO_SECCION.match(linea):
+                    estructura.append({
+                        'nivel': 1,
+                        'titulo': linea[:100],
+                        'pagina_inicio': pagina_num
+                    })
 
         return estructura
 
@@ -148,7 +149,7 @@ class PDFSplitter:
             pagina_inicio = seccion['pagina_inicio']
             pagina_fin = (estructura[i + 1]['pagina_inicio'] - 1
                          if i + 1 < len(estructura)
-                         else len(doc) - 1)
+                         else doc.page_count - 1)
 
             # Crear nuevo PDF con esta sección
             titulo_limpio = self._limpiar_nombre_archivo(seccion['titulo'])
@@ -171,7 +172,7 @@ class PDFSplitter:
                             nombre_base: str) -> List[str]:
         """Divide el PDF en secciones de tamaño fijo"""
         archivos_generados = []
-        total_paginas = len(doc)
+        total_paginas = doc.page_count
         num_secciones = (total_paginas + max_paginas - 1) // max_paginas
 
         for i in range(num_secciones):
@@ -244,8 +245,7 @@ class PDFSplitter:
             archivos_generados = []
 
             # Detectar artículos en el texto
-            patron_articulo = r'Art[íi]culo\s+(\d+)[°º]?'
-            matches = list(re.finditer(patron_articulo, texto_completo, re.IGNORECASE))
+            matches = list(_PATRON_ARTICULO.finditer(texto_completo))
 
             if len(matches) < 2:
                 print("No se detectaron suficientes artículos para dividir")
@@ -253,7 +253,7 @@ class PDFSplitter:
                 return []
 
             # Estimar páginas por artículo
-            caracteres_por_pagina = len(texto_completo) / len(doc)
+            caracteres_por_pagina = len(texto_completo) / doc.page_count
 
             articulos_info = []
             for i, match in enumerate(matches):
@@ -276,7 +276,7 @@ class PDFSplitter:
             # Crear PDFs para cada grupo
             for i, grupo in enumerate(grupos):
                 pagina_inicio = grupo[0]['pagina']
-                pagina_fin = min(grupo[-1]['pagina'] + 2, len(doc) - 1)
+                pagina_fin = min(grupo[-1]['pagina'] + 2, doc.page_count - 1)
 
                 numeros_articulos = [a['numero'] for a in grupo]
                 nombre_archivo = f"{path.stem}_articulos_{numeros_articulos[0]}-{numeros_articulos[-1]}.pdf"
@@ -319,9 +319,9 @@ class PDFSplitter:
     def _limpiar_nombre_archivo(self, texto: str, max_length: int = 50) -> str:
         """Limpia un texto para usarlo como nombre de archivo"""
         # Eliminar caracteres no válidos
-        texto = re.sub(r'[^\w\s-]', '', texto)
+        texto = _PATRON_CARACTERES_INVALIDOS.sub('', texto)
         # Reemplazar espacios por guiones bajos
-        texto = re.sub(r'\s+', '_', texto)
+        texto = _PATRON_ESPACIOS.sub('_', texto)
         # Limitar longitud
         texto = texto[:max_length]
         return texto.lower()
@@ -340,18 +340,16 @@ class PDFSplitter:
 
         for archivo in archivos_divididos:
             try:
-                doc = fitz.open(archivo)
-                metadata = doc.metadata
-
-                info = {
-                    'archivo': archivo,
-                    'nombre': Path(archivo).name,
-                    'numero_paginas': len(doc),
-                    'tamanio_bytes': Path(archivo).stat().st_size,
-                    'metadata': metadata
-                }
+                path = Path(archivo)
+                with fitz.open(archivo) as doc:
+                    info = {
+                        'archivo': archivo,
+                        'nombre': path.name,
+                        'numero_paginas': doc.page_count,
+                        'tamanio_bytes': path.stat().st_size,
+                        'metadata': doc.metadata
+                    }
 
-                doc.close()
                 info_secciones.append(info)
 
             except Exception as e:
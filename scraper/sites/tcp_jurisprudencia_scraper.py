@@ -9,6 +9,7 @@ Sitios cubiertos:
 
 import time
 import hashlib
+import shutil
 from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
@@ -28,8 +29,7 @@ from selenium.common.exceptions import (
 from webdriver_manager.chrome import ChromeDriverManager
 
 import requests
-from bs4 import BeautifulSoup
-from tqdm import tqdm
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
 
 # Configurar logging
 logging.basicConfig(
@@ -39,6 +39,68 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _localizadores(*selectores: str) -> tuple:
+    """Convierte selectores CSS/XPath en tuplas (By, selector) una sola vez"""
+    return tuple(
+        (By.XPATH, selector) if selector.startswith('//') else (By.CSS_SELECTOR, selector)
+        for selector in selectores
+    )
+
+
+# Selectores posibles para cada elemento de la interfaz del TCP
+_LOCALIZADORES_BUSCAR = _localizadores(
+    "button[type='submit']",
+    "input[type='submit']",
+    "button.btn-buscar",
+    "button.buscar",
+    "#btnBuscar",
+    "//button[contains(text(), 'Buscar')]",
+    "//button[contains(text(), 'BUSCAR')]",
+    "//input[@type='submit']"
+)
+_LOCALIZADORES_FILAS = _localizadores(
+    "table tbody tr",
+    "tr.sentencia",
+    "tr[data-id]",
+    ".table-row",
+    "//table//tbody//tr",
+    "//tr[contains(@class, 'sentencia')]"
+)
+_LOCALIZADORES_SUMILLA = _localizadores(
+    "//div[contains(@class, 'sumilla')]",
+    "//div[contains(text(), 'Sumilla')]//following-sibling::div",
+    "//*[contains(text(), 'SUMILLA')]//following-sibling::*",
+    ".sumilla",
+    "#sumilla"
+)
+_LOCALIZADORES_MAGISTRADOS = _localizadores(
+    "//div[contains(text(), 'Magistrado')]//following-sibling::div",
+    "//*[contains(text(), 'MAGISTRADO')]//following-sibling::*",
+    ".magistrados",
+    "#magistrados"
+)
+_LOCALIZADORES_AREA = _localizadores(
+    "//div[contains(text(), 'Área')]//following-sibling::div",
+    "//div[contains(text(), 'Materia')]//following-sibling::div",
+    "//*[contains(text(), 'ÁREA')]//following-sibling::*",
+    ".area",
+    ".materia"
+)
+_LOCALIZADORES_SIGUIENTE = _localizadores(
+    "a.next",
+    "button.next",
+    "a[rel='next']",
+    "//a[contains(text(), 'Siguiente')]",
+    "//a[contains(text(), 'SIGUIENTE')]",
+    "//button[contains(text(), 'Siguiente')]",
+    "//a[contains(@class, 'next')]",
+    "//li[@class='next']/a",
+    ".pagination .next",
+    "a[aria-label='Next']",
+    "button[aria-label='Next']"
+)
+
+
 class TCPJurisprudenciaScraper:
     """
     Scraper especializado para jurisprudencia del TCP usando Selenium
@@ -73,6 +135,11 @@ class TCPJurisprudenciaScraper:
         self.driver = None
         self.wait = None
 
+        # Selectores que funcionaron en la página anterior; se prueban
+        # primero para no esperar el timeout de los que no existen
+        self._localizador_filas = None
+        self._localizador_siguiente = None
+
         # Estadísticas
         self.estadisticas = {
             'sentencias_encontradas': 0,
@@ -235,6 +302,13 @@ class TCPJurisprudenciaScraper:
 
         return sentencias_totales
 
+    @staticmethod
+    def _priorizar(localizadores: tuple, preferido: Optional[tuple]) -> tuple:
+        """Devuelve los localizadores con el preferido (si lo hay) al inicio"""
+        if preferido is None:
+            return localizadores
+        return (preferido,) + tuple(l for l in localizadores if l != preferido)
+
     def _realizar_busqueda_vacia(self) -> bool:
         """
         Realiza una búsqueda vacía para listar todas las sentencias
@@ -245,29 +319,9 @@ class TCPJurisprudenciaScraper:
         try:
             # Buscar el botón de búsqueda o formulario
             # Intentar varios selectores posibles
-            selectores_buscar = [
-                "button[type='submit']",
-                "input[type='submit']",
-                "button.btn-buscar",
-                "button.buscar",
-                "#btnBuscar",
-                "//button[contains(text(), 'Buscar')]",
-                "//button[contains(text(), 'BUSCAR')]",
-                "//input[@type='submit']"
-            ]
-
-            for selector in selectores_buscar:
+            for localizador in _LOCALIZADORES_BUSCAR:
                 try:
-                    if selector.startswith('//'):
-                        # XPath
-                        boton = self.wait.until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                    else:
-                        # CSS Selector
-                        boton = self.wait.until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                        )
+                    boton = self.wait.until(EC.element_to_be_clickable(localizador))
 
                     boton.click()
                     logger.info("✅ Búsqueda vacía realizada")
@@ -298,25 +352,14 @@ class TCPJurisprudenciaScraper:
             time.sleep(2)
 
             # Buscar filas de la tabla con varios selectores posibles
-            selectores_filas = [
-                "table tbody tr",
-                "tr.sentencia",
-                "tr[data-id]",
-                ".table-row",
-                "//table//tbody//tr",
-                "//tr[contains(@class, 'sentencia')]"
-            ]
-
             filas = []
-            for selector in selectores_filas:
+            for localizador in self._priorizar(_LOCALIZADORES_FILAS, self._localizador_filas):
                 try:
-                    if selector.startswith('//'):
-                        filas = self.driver.find_elements(By.XPATH, selector)
-                    else:
-                        filas = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                    filas = self.driver.find_elements(*localizador)
 
                     if filas:
-                        logger.info(f"✅ Encontradas {len(filas)} filas con selector: {selector}")
+                        self._localizador_filas = localizador
+                        logger.info(f"✅ Encontradas {len(filas)} filas con selector: {localizador[1]}")
                         break
                 except Exception:
                     continue
@@ -326,15 +369,18 @@ class TCPJurisprudenciaScraper:
                 return sentencias
 
             # Procesar cada fila
+            # _extraer_datos_fila ya captura sus errores y devuelve None,
+            # así que solo se cuentan las filas omitidas y se informa una vez
+            omitidas = 0
             for i, fila in enumerate(filas, 1):
-                try:
-                    sentencia = self._extraer_datos_fila(fila, i)
-                    if sentencia:
-                        sentencias.append(sentencia)
+                sentencia = self._extraer_datos_fila(fila, i)
+                if sentencia:
+                    sentencias.append(sentencia)
+                else:
+                    omitidas += 1
 
-                except Exception as e:
-                    logger.error(f"❌ Error procesando fila {i}: {e}")
-                    continue
+            if omitidas:
+                logger.debug(f"   {omitidas} filas omitidas sin datos válidos")
 
         except Exception as e:
             logger.error(f"❌ Error extrayendo sentencias de página: {e}")
@@ -375,17 +421,11 @@ class TCPJurisprudenciaScraper:
             # Intentar extraer información de las celdas
             # La estructura puede variar, así que ser flexible
             try:
-                # Buscar número de resolución
-                if len(celdas) > 0:
-                    sentencia_data['numero_resolucion'] = celdas[0].text.strip()
-
-                # Tipo jurisprudencia
-                if len(celdas) > 1:
-                    sentencia_data['tipo_jurisprudencia'] = celdas[1].text.strip()
-
-                # Tipo resolutivo
-                if len(celdas) > 2:
-                    sentencia_data['tipo_resolutivo'] = celdas[2].text.strip()
+                # Número de resolución, tipo jurisprudencia y tipo resolutivo
+                # (la fila ya tiene al menos 3 celdas)
+                sentencia_data['numero_resolucion'] = celdas[0].text.strip()
+                sentencia_data['tipo_jurisprudencia'] = celdas[1].text.strip()
+                sentencia_data['tipo_resolutivo'] = celdas[2].text.strip()
 
                 # Fecha
                 if len(celdas) > 3:
@@ -420,7 +460,7 @@ class TCPJurisprudenciaScraper:
             return None
 
         except Exception as e:
-            logger.error(f"❌ Error extrayendo datos de fila {numero_fila}: {e}")
+            logger.debug(f"   Fila {numero_fila} omitida: {e}")
             return None
 
     def _extraer_detalles_ficha(self, enlace_ficha) -> Optional[Dict]:
@@ -456,20 +496,9 @@ class TCPJurisprudenciaScraper:
             # Extraer información de la ficha
             try:
                 # Buscar sumilla
-                selectores_sumilla = [
-                    "//div[contains(@class, 'sumilla')]",
-                    "//div[contains(text(), 'Sumilla')]//following-sibling::div",
-                    "//*[contains(text(), 'SUMILLA')]//following-sibling::*",
-                    ".sumilla",
-                    "#sumilla"
-                ]
-
-                for selector in selectores_sumilla:
+                for localizador in _LOCALIZADORES_SUMILLA:
                     try:
-                        if selector.startswith('//'):
-                            elemento = self.driver.find_element(By.XPATH, selector)
-                        else:
-                            elemento = self.driver.find_element(By.CSS_SELECTOR, selector)
+                        elemento = self.driver.find_element(*localizador)
 
                         detalles['sumilla'] = elemento.text.strip()
                         break
@@ -477,19 +506,9 @@ class TCPJurisprudenciaScraper:
                         continue
 
                 # Buscar magistrados
-                selectores_magistrados = [
-                    "//div[contains(text(), 'Magistrado')]//following-sibling::div",
-                    "//*[contains(text(), 'MAGISTRADO')]//following-sibling::*",
-                    ".magistrados",
-                    "#magistrados"
-                ]
-
-                for selector in selectores_magistrados:
+                for localizador in _LOCALIZADORES_MAGISTRADOS:
                     try:
-                        if selector.startswith('//'):
-                            elementos = self.driver.find_elements(By.XPATH, selector)
-                        else:
-                            elementos = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                        elementos = self.driver.find_elements(*localizador)
 
                         magistrados = [elem.text.strip() for elem in elementos if elem.text.strip()]
                         if magistrados:
@@ -499,20 +518,9 @@ class TCPJurisprudenciaScraper:
                         continue
 
                 # Buscar área/materia
-                selectores_area = [
-                    "//div[contains(text(), 'Área')]//following-sibling::div",
-                    "//div[contains(text(), 'Materia')]//following-sibling::div",
-                    "//*[contains(text(), 'ÁREA')]//following-sibling::*",
-                    ".area",
-                    ".materia"
-                ]
-
-                for selector in selectores_area:
+                for localizador in _LOCALIZADORES_AREA:
                     try:
-                        if selector.startswith('//'):
-                            elemento = self.driver.find_element(By.XPATH, selector)
-                        else:
-                            elemento = self.driver.find_element(By.CSS_SELECTOR, selector)
+                        elemento = self.driver.find_element(*localizador)
 
                         detalles['area_materia'] = elemento.text.strip()
                         break
@@ -569,37 +577,45 @@ class TCPJurisprudenciaScraper:
         Returns:
             Ruta al archivo descargado o None
         """
+        # Generar nombre de archivo único
+        hash_url = hashlib.md5(url.encode()).hexdigest()[:8]
+        nombre_archivo = f"tcp_sentencia_{hash_url}.pdf"
+
+        ruta_archivo = self.output_dir / nombre_archivo
+        ruta_temporal = ruta_archivo.with_name(nombre_archivo + '.part')
+
         try:
             # Intentar con reintentos
             for intento in range(self.retry_attempts):
                 try:
-                    respuesta = self.session.get(url, timeout=30, stream=True)
-                    respuesta.raise_for_status()
+                    with self.session.get(url, timeout=30, stream=True) as respuesta:
+                        respuesta.raise_for_status()
 
-                    # Generar nombre de archivo único
-                    hash_url = hashlib.md5(url.encode()).hexdigest()[:8]
-                    nombre_archivo = f"tcp_sentencia_{hash_url}.pdf"
-
-                    ruta_archivo = self.output_dir / nombre_archivo
-
-                    # Guardar archivo
-                    with open(ruta_archivo, 'wb') as f:
-                        for chunk in respuesta.iter_content(chunk_size=8192):
-                            f.write(chunk)
+                        # Guardar archivo (la copia se hace en C con buffer de 1 MB).
+                        # Se escribe a un temporal para que una descarga cortada
+                        # no quede como PDF en la ruta final
+                        respuesta.raw.decode_content = True
+                        with open(ruta_temporal, 'wb') as f:
+                            shutil.copyfileobj(respuesta.raw, f, length=1 << 20)
+                        ruta_temporal.replace(ruta_archivo)
 
                     logger.debug(f"   ✅ PDF descargado: {nombre_archivo}")
                     return str(ruta_archivo)
 
-                except requests.RequestException as e:
+                # Al leer respuesta.raw los cortes llegan como errores de
+                # urllib3, que requests no envuelve
+                except (requests.RequestException, ProtocolError, ReadTimeoutError) as e:
                     logger.warning(f"   ⚠️  Intento {intento + 1}/{self.retry_attempts} falló: {e}")
                     if intento < self.retry_attempts - 1:
                         time.sleep(2 ** intento)  # Backoff exponencial
                     else:
                         logger.error(f"   ❌ No se pudo descargar PDF: {url}")
+                        ruta_temporal.unlink(missing_ok=True)
                         return None
 
         except Exception as e:
             logger.error(f"❌ Error descargando PDF {url}: {e}")
+            ruta_temporal.unlink(missing_ok=True)
             return None
 
     def _ir_siguiente_pagina(self) -> bool:
@@ -611,33 +627,12 @@ class TCPJurisprudenciaScraper:
         """
         try:
             # Buscar botón "Siguiente" o paginación
-            selectores_siguiente = [
-                "a.next",
-                "button.next",
-                "a[rel='next']",
-                "//a[contains(text(), 'Siguiente')]",
-                "//a[contains(text(), 'SIGUIENTE')]",
-                "//button[contains(text(), 'Siguiente')]",
-                "//a[contains(@class, 'next')]",
-                "//li[@class='next']/a",
-                ".pagination .next",
-                "a[aria-label='Next']",
-                "button[aria-label='Next']"
-            ]
-
-            for selector in selectores_siguiente:
+            for localizador in self._priorizar(_LOCALIZADORES_SIGUIENTE, self._localizador_siguiente):
                 try:
-                    if selector.startswith('//'):
-                        boton_siguiente = self.wait.until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                    else:
-                        boton_siguiente = self.wait.until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                        )
+                    boton_siguiente = self.wait.until(EC.element_to_be_clickable(localizador))
 
                     # Verificar si el botón está habilitado
-                    if 'disabled' in boton_siguiente.get_attribute('class') or '':
+                    if 'disabled' in (boton_siguiente.get_attribute('class') or ''):
                         continue
 
                     # Scroll al elemento
@@ -646,6 +641,7 @@ class TCPJurisprudenciaScraper:
 
                     # Click
                     boton_siguiente.click()
+                    self._localizador_siguiente = localizador
                     logger.info("   ➡️  Navegando a siguiente página")
                     time.sleep(2)
                     return True
@@ -688,7 +684,7 @@ class TCPJurisprudenciaScraper:
         if formato == 'json':
             archivo = self.output_dir / f"tcp_sentencias_{timestamp}.json"
             with open(archivo, 'w', encoding='utf-8') as f:
-                json.dump(sentencias, f, ensure_ascii=False, indent=2)
+                f.write(json.dumps(sentencias, ensure_ascii=False, indent=2))
 
         elif formato == 'csv':
             archivo = self.output_dir / f"tcp_sentencias_{timestamp}.csv"
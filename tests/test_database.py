@@ -0,0 +1,95 @@
+"""Pruebas de la base de datos de leyes (scraper/database.py)"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# scraper/database.py no depende del resto del paquete: se importa
+# directamente para no cargar los scrapers y sus dependencias
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scraper'))
+
+from database import LawDatabase  # noqa: E402
+
+
+def _metadata_base(**extra):
+    """Metadatos mínimos de una ley (las columnas NOT NULL)"""
+    metadata = {
+        'codigo_unico': 'LEY-1178',
+        'numero_ley': '1178',
+        'tipo_norma': 'Ley',
+        'titulo': 'Ley de Administración y Control Gubernamentales',
+        'area_derecho': 'Administrativo',
+        'jerarquia_normativa': 'Legal',
+        'fecha_promulgacion': '1990-07-20',
+        'organo_emisor': 'Congreso Nacional',
+        'url_origen': 'https://ejemplo.com/ley1178.pdf',
+        'sitio_web': 'Gaceta Oficial',
+        'fecha_scraping': '2024-01-01T00:00:00',
+        'formato_original': 'PDF',
+        'tamanio_bytes': 1024,
+        'hash_md5': 'abc123',
+        'hash_sha256': 'def456',
+        'ruta_archivo_original': 'data/raw/ley1178.pdf',
+    }
+    metadata.update(extra)
+    return metadata
+
+
+def _filas(db):
+    """Filas de la tabla leyes sin las columnas que asigna SQLite"""
+    db.cursor.execute("SELECT * FROM leyes ORDER BY codigo_unico")
+    ignoradas = {'id', 'creado_en', 'actualizado_en'}
+    return [{k: v for k, v in dict(row).items() if k not in ignoradas}
+            for row in db.cursor.fetchall()]
+
+
+@pytest.fixture
+def db(tmp_path):
+    with LawDatabase(str(tmp_path / 'leyes.db')) as base:
+        yield base
+
+
+def test_insertar_leyes_codigo_repetido_con_distintas_claves(tmp_path, db):
+    # La primera y la tercera tienen las mismas claves: agrupando por
+    # columnas la segunda se insertaría al final y sería la que quedara
+    primera = _metadata_base(firmante='Víctor Paz Estenssoro',
+                             estado_procesamiento='pendiente')
+    segunda = _metadata_base(resumen='Versión intermedia', vigente=False)
+    tercera = _metadata_base(firmante='Jaime Paz Zamora',
+                             estado_procesamiento='completado')
+
+    leyes = [primera, segunda, tercera]
+    assert db.insertar_leyes([dict(ley) for ley in leyes]) == 3
+
+    # Queda la última ley del lote, con los valores por defecto de las
+    # columnas que no trae
+    filas = _filas(db)
+    assert len(filas) == 1
+    assert filas[0]['firmante'] == 'Jaime Paz Zamora'
+    assert filas[0]['estado_procesamiento'] == 'completado'
+    assert filas[0]['resumen'] is None
+    assert filas[0]['vigente'] == 1
+
+    # Mismo resultado que insertar una a una
+    with LawDatabase(str(tmp_path / 'una_a_una.db')) as referencia:
+        for ley in leyes:
+            referencia.insertar_ley(dict(ley))
+        assert _filas(referencia) == filas
+
+
+def test_insertar_leyes_fila_invalida_no_descarta_las_demas(db):
+    valida = _metadata_base()
+    invalida = _metadata_base(codigo_unico='LEY-0000')
+    del invalida['titulo']  # titulo es NOT NULL
+
+    assert db.insertar_leyes([valida, invalida]) == 1
+    assert [fila['codigo_unico'] for fila in _filas(db)] == ['LEY-1178']
+
+
+def test_buscar_ley_sin_criterios_devuelve_todas(db):
+    db.insertar_leyes([_metadata_base(),
+                       _metadata_base(codigo_unico='LEY-1700', numero_ley='1700')])
+
+    assert sorted(ley['codigo_unico'] for ley in db.buscar_ley()) == ['LEY-1178', 'LEY-1700']
+    assert [ley['codigo_unico'] for ley in db.buscar_ley(numero_ley='1700')] == ['LEY-1700']